@@ -2,30 +2,152 @@
 Database connection and Prisma client setup
 """
 import sys
+import os
+import time
+import re
 import asyncio
+import logging
+import functools
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Final, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qs, parse_qsl, urlencode, quote
+from dotenv import load_dotenv
 
-# Import Prisma client (generated in prisma_client subdirectory)
-try:
+if TYPE_CHECKING:
     from prisma_client import Prisma
-except ImportError:
-    sys.exit(1)
 
-# Fix Windows event loop issue
-if sys.platform == 'win32':
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Environment checks resolved once at import (after .env is loaded)
+_IS_WIN32: Final = sys.platform == 'win32'
+_IS_LAMBDA: Final = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+# Pool sizing: pool ~= workers x max parallel queries per request.
+# get_assets runs 4-5 queries per call (permission check, summary, page, image counts),
+# so a single worker wants at least 5; 10 leaves headroom for concurrent requests.
+_POOL_SIZE: Final = 1 if _IS_LAMBDA else int(os.getenv("PRISMA_POOL_SIZE", "10"))
+_POOL_TIMEOUT: Final = os.getenv("PRISMA_POOL_TIMEOUT", "20")
+_POOL_WARMUP: Final = int(os.getenv("PRISMA_POOL_WARMUP", "4"))
+
+def get_loop_factory():
+    """
+    Event loop factory for asyncio.Runner / asyncio.run(loop_factory=...).
+    Prisma needs the selector loop on Windows; everywhere else the default is fine.
+    """
+    if _IS_WIN32:
+        return asyncio.SelectorEventLoop
+    return None
+
+# Fallback for launches that don't go through run.py / main.py's Runner
+# (e.g. `uvicorn main:app`): uvicorn 0.32 only sets the selector policy itself
+# with --reload or --workers, so keep Windows off the Proactor loop here
+if _IS_WIN32:
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-# Prisma client instance
-prisma = Prisma()
+# Supabase pooler host pinned to the direct-connection port (should be 6543)
+_POOLER_PORT_RE = re.compile(r'(@[^@/]+\.pooler\.supabase\.com):5432\b')
+
+# Connection pool settings appended to DATABASE_URL unless already present.
+# Serverless functions get one connection each, otherwise N lambdas exhaust the pooler.
+_POOL_PARAMS: Final = {
+    "connection_limit": str(_POOL_SIZE),
+    "pool_timeout": _POOL_TIMEOUT,
+    "connect_timeout": "10",
+}
+
+@functools.lru_cache(maxsize=4)
+def _rewrite_database_url(url: str) -> str:
+    """Fix up DATABASE_URL for Supabase (mirrors lib/prisma.ts on the Next.js side)"""
+    # Cheap substring check so non-Supabase URLs never hit the regex
+    is_pooler = "pooler.supabase.com" in url
+    if is_pooler:
+        url = _POOLER_PORT_RE.sub(r'\1:6543', url)
+
+    # Bound the pool explicitly - Prisma's default (num_cpus * 2 + 1) is too
+    # large for the Supabase pooler and leads to pool timeouts under load
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    # PgBouncer in transaction mode can't keep prepared statements across queries
+    if is_pooler or parts.port == 6543:
+        query["pgbouncer"] = "true"
+    for key, value in _POOL_PARAMS.items():
+        query.setdefault(key, value)
+    return urlunsplit(parts._replace(query=urlencode(query, quote_via=quote)))
+
+def _database_url() -> Optional[str]:
+    """Effective database URL, or None if DATABASE_URL is not set"""
+    url = os.getenv("DATABASE_URL")
+    return _rewrite_database_url(url) if url else None
+
+def _datasource():
+    """Datasource override for Prisma, or None to use the schema's env("DATABASE_URL")"""
+    url = _database_url()
+    return {"url": url} if url else None
+
+@functools.lru_cache(maxsize=4)
+def _connection_limit(url: str) -> Optional[int]:
+    """connection_limit query param of the database URL, if set"""
+    values = parse_qs(urlsplit(url).query).get("connection_limit")
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+def _warmup_size() -> int:
+    """Number of pool connections to open before serving traffic"""
+    limit = _connection_limit(_database_url() or "")
+    return min(_POOL_WARMUP, limit) if limit else _POOL_WARMUP
+
+async def _warm_pool(prisma: "Prisma") -> None:
+    """Open pool connections up front so the first requests don't pay the handshake"""
+    size = _warmup_size()
+    if size <= 0:
+        return
+    try:
+        await asyncio.gather(*(prisma.query_raw("SELECT 1") for _ in range(size)))
+    except Exception as e:
+        # Warm-up is best effort; requests will open connections on demand
+        logger.warning("Database pool warm-up failed: %s: %s", type(e).__name__, e)
+
+# Prisma client instance, created on first use.
+# The generated client is slow to import, so it is kept off the import path
+# until something actually needs the database.
+_prisma: Optional["Prisma"] = None
+
+def _get_prisma() -> "Prisma":
+    """Return the shared Prisma client, importing and creating it on first call"""
+    global _prisma
+    if _prisma is None:
+        # Import Prisma client (generated in prisma_client subdirectory)
+        try:
+            from prisma_client import Prisma
+        except ImportError:
+            sys.exit(1)
+        _prisma = Prisma(datasource=_datasource())
+    return _prisma
+
+def __getattr__(name: str):
+    # Keeps `from database import prisma` working for the routers (PEP 562)
+    if name == "prisma":
+        return _get_prisma()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 @asynccontextmanager
 async def lifespan(app):
     """Manage Prisma client lifecycle"""
+    prisma = _get_prisma()
+
     # Startup: Connect to database
+    started = time.perf_counter()
     await prisma.connect()
-    
+    await _warm_pool(prisma)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Database connected in %.1fms", (time.perf_counter() - started) * 1000)
+
     yield
-    
-    # Shutdown: Disconnect from database
-    await prisma.disconnect()
 
+    # Shutdown: stop the PDF workers (and their browsers), then disconnect from database
+    from utils.form_pdf_generator import shutdown_pdf_workers
+    await asyncio.to_thread(shutdown_pdf_workers)
+    await prisma.disconnect()
@@ -4,6 +4,7 @@ Main application entry point
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import os
 import logging
 from dotenv import load_dotenv
@@ -29,7 +30,9 @@ app = FastAPI(
     title="Asset Management API",
     description="FastAPI backend for asset management system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson encodes the already-serialized response payloads faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware - allow Next.js frontend
@@ -110,11 +113,17 @@ async def health_check():
     return {"status": "ok", "service": "backend"}
 
 if __name__ == "__main__":
+    import asyncio
     import uvicorn
+    from database import get_loop_factory
     
-    uvicorn.run(
+    config = uvicorn.Config(
         app, 
         host="0.0.0.0", 
         port=8000,
-        loop="asyncio"
+        loop="none"
     )
+    server = uvicorn.Server(config)
+    
+    with asyncio.Runner(loop_factory=get_loop_factory()) as runner:
+        runner.run(server.serve())
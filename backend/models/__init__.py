@@ -1,6 +1,9 @@
 """
 Pydantic models for API requests and responses
 """
+from typing import List
+from pydantic import TypeAdapter
+
 from .locations import (
     Location,
     LocationCreate,
@@ -45,6 +48,12 @@ from .employees import (
     PaginationInfo
 )
 
+# Reusable validators for bulk list responses - the schema is compiled once
+# here instead of per request
+LOCATION_LIST_ADAPTER = TypeAdapter(List[Location])
+SITE_LIST_ADAPTER = TypeAdapter(List[Site])
+CATEGORY_LIST_ADAPTER = TypeAdapter(List[Category])
+
 __all__ = [
     "Location",
     "LocationCreate",
@@ -77,5 +86,8 @@ __all__ = [
     "EmployeesResponse",
     "EmployeeResponse",
     "PaginationInfo",
+    "LOCATION_LIST_ADAPTER",
+    "SITE_LIST_ADAPTER",
+    "CATEGORY_LIST_ADAPTER",
 ]
 
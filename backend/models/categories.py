@@ -31,6 +31,8 @@ class CategoryUpdate(BaseModel):
     description: Optional[str] = None
 
 class CategoriesResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     categories: List[Category]
 
 class CategoryResponse(BaseModel):
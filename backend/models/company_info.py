@@ -2,8 +2,9 @@
 Pydantic models for Company Info API
 """
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime
+import time
 
 class CompanyInfo(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -46,3 +47,29 @@ class CompanyInfoUpdate(BaseModel):
 class CompanyInfoResponse(BaseModel):
     companyInfo: Optional[CompanyInfo] = None
 
+# Company info is a singleton row that rarely changes, so keep the last response
+# in memory for a short while instead of querying on every request.
+# (cached_at, response) - cached_at of 0.0 means empty
+_COMPANY_INFO_CACHE: Tuple[float, Optional[CompanyInfoResponse]] = (0.0, None)
+
+async def get_company_info_cached(prisma, ttl: float = 30.0) -> CompanyInfoResponse:
+    """Return the company info response, re-querying at most once per `ttl` seconds"""
+    global _COMPANY_INFO_CACHE
+    cached_at, cached = _COMPANY_INFO_CACHE
+    if cached is not None and time.monotonic() - cached_at < ttl:
+        return cached
+    
+    # Get the most recent company info record (there should only be one)
+    company_info_data = await prisma.companyinfo.find_first(
+        order={"createdAt": "desc"}
+    )
+    response = CompanyInfoResponse(
+        companyInfo=CompanyInfo.model_validate(company_info_data) if company_info_data else None
+    )
+    _COMPANY_INFO_CACHE = (time.monotonic(), response)
+    return response
+
+def invalidate_company_info_cache() -> None:
+    """Drop the cached company info; call after any write to the companyinfo table"""
+    global _COMPANY_INFO_CACHE
+    _COMPANY_INFO_CACHE = (0.0, None)
@@ -23,6 +23,8 @@ class LocationUpdate(BaseModel):
     description: Optional[str] = None
 
 class LocationsResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     locations: List[Location]
 
 class LocationResponse(BaseModel):
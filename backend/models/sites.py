@@ -1,11 +1,13 @@
 """
 Pydantic models for Sites API
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from datetime import datetime
 
 class Site(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
     name: str
     description: Optional[str] = None
@@ -21,6 +23,8 @@ class SiteUpdate(BaseModel):
     description: Optional[str] = None
 
 class SitesResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     sites: List[Site]
 
 class SiteResponse(BaseModel):
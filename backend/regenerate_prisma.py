@@ -1,24 +1,35 @@
 #!/usr/bin/env python3
 """
 Regenerate Prisma Python client with Linux binary paths
+Pass --force to regenerate even if the schema is unchanged since the last run
 """
 import sys
 import os
 import re
+import hashlib
 from pathlib import Path
 
 from prisma_client.cli.prisma import ensure_cached, run
 
+SCHEMA_CANDIDATES = ('prisma_client/schema.prisma', 'prisma/schema.prisma')
+
+# Generator output path as written in the repo schema (relative to /prisma)
+_OUTPUT_RE = re.compile(r'output\s*=\s*["\']\.\./backend/prisma_client["\']')
+
+# Records the schema + platform of the last successful generate
+STAMP_FILE = Path('.prisma-gen.stamp')
+
+def schema_stamp(schema_content):
+    """Fingerprint of the schema for the current platform (binaries are platform specific)"""
+    return hashlib.sha256(f'{sys.platform}\n{schema_content}'.encode()).hexdigest()
+
+def find_schema_path():
+    """Return the first existing schema file, or None"""
+    return next((path for path in SCHEMA_CANDIDATES if os.path.exists(path)), None)
+
 def main():
-    # Ensure Prisma CLI is cached
-    ensure_cached()
-    
-    # Find schema file
-    schema_path = None
-    for path in ['prisma_client/schema.prisma', 'prisma/schema.prisma']:
-        if os.path.exists(path):
-            schema_path = path
-            break
+    # Find schema file before touching the Prisma CLI so a bad checkout fails fast
+    schema_path = find_schema_path()
     
     if not schema_path:
         print('ERROR: Could not find schema.prisma', file=sys.stderr)
@@ -28,29 +39,40 @@ def main():
     # Read schema and fix output path
     schema_content = Path(schema_path).read_text()
     # Replace output path to be relative to current directory
-    schema_content = re.sub(
-        r'output\s*=\s*["\']\.\./backend/prisma_client["\']',
-        'output = "prisma_client"',
-        schema_content
-    )
+    schema_content = _OUTPUT_RE.sub('output = "prisma_client"', schema_content)
     
-    # Write temporary schema
+    # Nothing to do if this exact schema was already generated on this platform
+    client_file = Path('prisma_client/client.py')
+    stamp = schema_stamp(schema_content)
+    if '--force' not in sys.argv and client_file.exists() and STAMP_FILE.exists() and STAMP_FILE.read_text().strip() == stamp:
+        print('Prisma client is up to date, skipping generate')
+        sys.exit(0)
+    
+    # Ensure Prisma CLI is cached
+    ensure_cached()
+    
+    # Write temporary schema (the output path is relative to it, so it must live here).
+    # Write-then-rename so an interrupted run never leaves a partial schema behind.
     temp_schema = Path('schema.temp.prisma')
-    temp_schema.write_text(schema_content)
+    partial_schema = Path('schema.temp.prisma.partial')
+    partial_schema.write_text(schema_content)
+    os.replace(partial_schema, temp_schema)
     
     # Run prisma generate
     args = ['generate', '--generator=python_client', f'--schema={temp_schema}']
-    result = run(args)
-    
-    # Clean up temp schema
-    temp_schema.unlink()
+    try:
+        result = run(args)
+    finally:
+        # Clean up temp schema
+        temp_schema.unlink()
     
     if result != 0:
         print('ERROR: prisma generate failed', file=sys.stderr)
         sys.exit(result)
     
+    STAMP_FILE.write_text(stamp)
+    
     # Verify regeneration worked
-    client_file = Path('prisma_client/client.py')
     if client_file.exists():
         content = client_file.read_text()
         if 'debian-openssl' not in content and ('windows' in content.lower() or 'win32' in content.lower()):
@@ -2,14 +2,21 @@
 Assets API router
 """
 from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Form, Request, Path
-from typing import Optional, List, Dict, Any, Union
+from fastapi.responses import ORJSONResponse
+from typing import Optional, List, Dict, Any, Set, Tuple, Union
 from datetime import datetime, timedelta
+from uuid import UUID
 from decimal import Decimal
 import logging
 import asyncio
+import functools
 import os
 import re
 import random
+import time
+import calendar
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 import httpx
 from urllib.parse import urlparse
@@ -40,16 +47,29 @@ from models.assets import (
     GenerateAssetTagRequest,
     GenerateAssetTagResponse
 )
+from models.company_info import get_company_info_cached
 from auth import verify_auth, SUPABASE_URL, SUPABASE_ANON_KEY
 from database import prisma
 
 logger = logging.getLogger(__name__)
 
+# camelCase company names: "GoCodes" and "goCodes"
+_CAMEL_UPPER_RE = re.compile(r'^([A-Z][a-z]+)([A-Z][a-z]*)')
+_CAMEL_LOWER_RE = re.compile(r'^([a-z]+)([A-Z][a-z]*)')
+
 def is_uuid(value: str) -> bool:
     """Check if a string is a UUID"""
-    uuid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
-    return bool(uuid_pattern.match(value))
+    # Cheap length check first: asset tags never parse, so most lookups stop here
+    if len(value) != 36:
+        return False
+    try:
+        # UUID() also accepts braces, "urn:uuid:", "+" and "_", so require the
+        # canonical hyphenated form to round-trip
+        return str(UUID(value)) == value.lower()
+    except ValueError:
+        return False
 
+@functools.lru_cache(maxsize=256)
 def get_company_initials(company_name: Optional[str]) -> str:
     """
     Extract company initials from company name
@@ -76,14 +96,14 @@ def get_company_initials(company_name: Optional[str]) -> str:
         
         # Check for camelCase pattern - handles both "GoCodes" and "goCodes"
         # Pattern 1: Uppercase letter followed by lowercase, then uppercase (e.g., "GoCodes")
-        match1 = re.match(r'^([A-Z][a-z]+)([A-Z][a-z]*)', word)
+        match1 = _CAMEL_UPPER_RE.match(word)
         if match1:
             first_part = match1.group(1)
             second_part = match1.group(2)
             return f"{first_part[0].upper()}{second_part[0].upper()}"
         
         # Pattern 2: Lowercase followed by uppercase (e.g., "goCodes")
-        match2 = re.match(r'^([a-z]+)([A-Z][a-z]*)', word)
+        match2 = _CAMEL_LOWER_RE.match(word)
         if match2:
             first_part = match2.group(1)
             second_part = match2.group(2)
@@ -103,183 +123,298 @@ def get_company_initials(company_name: Optional[str]) -> str:
 
 router = APIRouter(prefix="/api/assets", tags=["assets"])
 
+# Asset tag generation: total random candidates tried, and how many are checked per query
+TAG_MAX_ATTEMPTS = 100
+TAG_CANDIDATE_BATCH_SIZE = 20
+
+# Imported status values that mean the asset is currently checked out
+IMPORT_CHECKOUT_STATUSES = frozenset({"checked out", "checked-out", "checkedout", "in use"})
+
+# Import columns holding image URLs, in priority order (exact names)
+IMPORT_IMAGE_FIELDS = ("images", "imageUrl", "image", "imageURL", "image_url")
+
+# Import columns holding document URLs (matched case-insensitively)
+IMPORT_DOCUMENT_FIELDS = frozenset({"documents", "documenturl", "document", "document_url"})
+
+# Image MIME types by URL extension where "image/<ext>" would be wrong;
+# other extensions map to "image/<ext>"
+IMPORT_IMAGE_MIME_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'svg': 'image/svg+xml',
+    'tif': 'image/tiff',
+    'ico': 'image/x-icon',
+}
+
+# Document MIME types by URL extension for imported documents
+IMPORT_DOCUMENT_MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xls': 'application/vnd.ms-excel',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'txt': 'text/plain',
+    'csv': 'text/csv',
+    'rtf': 'application/rtf',
+}
+
+# Rows per create_many call during an import; very large batches make the
+# Prisma engine spend seconds building the statement
+IMPORT_CREATE_BATCH_SIZE = 1000
+
+# Max image/document URLs downloaded and re-uploaded at once during an import
+IMPORT_UPLOAD_CONCURRENCY = 16
+
+# Threads for the synchronous Supabase storage calls made during imports. Sized to
+# the upload concurrency; the default executor has only cpu_count + 4 threads.
+_STORAGE_EXECUTOR = ThreadPoolExecutor(max_workers=IMPORT_UPLOAD_CONCURRENCY, thread_name_prefix="storage")
+
+# Shapes accepted by parse_date, classified up front so no format is tried blindly
+_EXCEL_SERIAL_RE = re.compile(r'^\+?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$')
+_YMD_RE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{1,2}):(\d{1,2})(?:\.(\d{1,6}))?)?$')
+_ISO_PREFIX_RE = re.compile(r'^\d{4}')
+_SLASH_DATE_RE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+_DASH_DATE_RE = re.compile(r'^(\d{1,2})-(\d{1,2})-(\d{4})$')
+
+def _is_valid_date(year: int, month: int, day: int) -> bool:
+    """True if year/month/day form a real calendar date"""
+    return 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
 def parse_date(date_str: Optional[str]) -> Optional[datetime]:
     """Parse date string to datetime"""
     if not date_str:
         return None
     
     # Handle Excel serial numbers (numbers or numeric strings)
-    try:
-        # Check if it's a number (Excel serial number)
-        if isinstance(date_str, (int, float)):
-            excel_serial = float(date_str)
-        else:
-            # Try to parse as number
-            excel_serial = float(str(date_str).strip())
-        
-        # Valid Excel serial numbers are typically > 1 and < 100000
-        if 1 < excel_serial < 100000:
-            # Excel date conversion
-            # Excel serial number 1 = January 1, 1900
-            # Excel incorrectly treats 1900 as a leap year, so we need to adjust
-            days_since_1900 = excel_serial - 1
-            
-            # Excel's leap year bug: for dates after Feb 28, 1900, subtract 1 day
-            if days_since_1900 > 59:
-                days_since_1900 = days_since_1900 - 1
-            
-            # Calculate the date
-            base_date = datetime(1900, 1, 1)
-            result = base_date + timedelta(days=days_since_1900)
-            return result
-    except (ValueError, TypeError):
-        pass
+    if isinstance(date_str, (int, float)):
+        excel_serial = float(date_str)
+    else:
+        date_str = str(date_str).strip()
+        excel_serial = float(date_str) if _EXCEL_SERIAL_RE.match(date_str) else None
+    
+    # Valid Excel serial numbers are typically > 1 and < 100000
+    if excel_serial is not None and 1 < excel_serial < 100000:
+        # Excel date conversion
+        # Excel serial number 1 = January 1, 1900
+        # Excel incorrectly treats 1900 as a leap year, so we need to adjust
+        days_since_1900 = excel_serial - 1
+        
+        # Excel's leap year bug: for dates after Feb 28, 1900, subtract 1 day
+        if days_since_1900 > 59:
+            days_since_1900 = days_since_1900 - 1
+        
+        # Calculate the date
+        base_date = datetime(1900, 1, 1)
+        return base_date + timedelta(days=days_since_1900)
     
-    # Convert to string for string-based parsing
     date_str = str(date_str).strip()
     
-    try:
-        # Try ISO format first
-        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-    except:
-        pass
+    # YYYY-MM-DD with optional time - built directly, no parsing attempts
+    ymd_match = _YMD_RE.match(date_str)
+    if ymd_match:
+        year, month, day, hour, minute, second, fraction = ymd_match.groups()
+        year, month, day = int(year), int(month), int(day)
+        if not _is_valid_date(year, month, day):
+            return None
+        if hour is None:
+            return datetime(year, month, day)
+        hour, minute, second = int(hour), int(minute), int(second)
+        if hour > 23 or minute > 59 or second > 59:
+            return None
+        microsecond = int(fraction.ljust(6, '0')) if fraction else 0
+        return datetime(year, month, day, hour, minute, second, microsecond)
     
-    # Try MM/DD/YYYY format (common Excel format)
-    import re
-    mm_dd_yyyy_match = re.match(r'^(\d{1,2})/(\d{1,2})/(\d{4})$', date_str)
-    if mm_dd_yyyy_match:
-        month, day, year = mm_dd_yyyy_match.groups()
+    # Other ISO forms (timezone suffix, compact dates, ...)
+    if _ISO_PREFIX_RE.match(date_str):
         try:
-            return datetime(int(year), int(month), int(day))
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
         except ValueError:
-            pass
+            return None
     
-    # Try DD/MM/YYYY format
-    dd_mm_yyyy_match = re.match(r'^(\d{1,2})-(\d{1,2})-(\d{4})$', date_str)
-    if dd_mm_yyyy_match:
-        day, month, year = dd_mm_yyyy_match.groups()
-        try:
-            return datetime(int(year), int(month), int(day))
-        except ValueError:
-            pass
+    # MM/DD/YYYY (common Excel format), falling back to DD/MM/YYYY
+    slash_match = _SLASH_DATE_RE.match(date_str)
+    if slash_match:
+        first, second, year = (int(part) for part in slash_match.groups())
+        if _is_valid_date(year, first, second):
+            return datetime(year, first, second)
+        if _is_valid_date(year, second, first):
+            return datetime(year, second, first)
+        return None
     
-    # Try common formats
-    for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f', '%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y']:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except:
-            continue
+    # DD-MM-YYYY, falling back to MM-DD-YYYY
+    dash_match = _DASH_DATE_RE.match(date_str)
+    if dash_match:
+        first, second, year = (int(part) for part in dash_match.groups())
+        if _is_valid_date(year, second, first):
+            return datetime(year, second, first)
+        if _is_valid_date(year, first, second):
+            return datetime(year, first, second)
+        return None
     
     return None
 
+# Spreadsheet spellings of booleans
+_TRUE_STRINGS = frozenset({"true", "yes", "1"})
+_FALSE_STRINGS = frozenset({"false", "no", "0"})
+
+def parse_number(value: Any) -> Optional[float]:
+    """Parse a spreadsheet number cell ("1,234.50", 12, "") to a float, None if blank or invalid"""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, str):
+            value = value.replace(",", "")
+        num = float(value)
+        return num if not (num != num) else None  # Check for NaN
+    except (ValueError, TypeError):
+        return None
+
+def parse_boolean(value: Any) -> Optional[bool]:
+    """Parse a spreadsheet boolean cell ("Yes", "0", True, ""), None if blank"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lower = value.lower().strip()
+        if lower in _TRUE_STRINGS:
+            return True
+        if lower in _FALSE_STRINGS:
+            return False
+    return bool(value) if value else None
+
+def _split_import_urls(field: Any) -> List[str]:
+    """URLs from an import cell: a comma/semicolon separated string or a list"""
+    if isinstance(field, str):
+        # Plain str.split beats a regex for a two-character alternation
+        return [url for url in (part.strip() for part in field.replace(';', ',').split(',')) if url]
+    if isinstance(field, list):
+        return [url for url in (str(item).strip() for item in field if item) if url]
+    return []
+
+def _is_http_url(url: Any) -> bool:
+    """Whether an imported cell value is an http(s) URL worth downloading"""
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+def _url_extension(url: str) -> Optional[str]:
+    """Lower-cased extension after the last dot of a URL (query string dropped)"""
+    return url.split('.')[-1].split('?')[0].lower() if '.' in url else None
+
+def _import_image_type(url: str) -> str:
+    """MIME type recorded for an imported image, guessed from its URL"""
+    url_extension = _url_extension(url)
+    if not url_extension:
+        return "image/jpeg"
+    return IMPORT_IMAGE_MIME_TYPES.get(url_extension) or f"image/{url_extension}"
+
+# Length of the timestamp suffix of uploaded asset file names:
+# <assetTagId>-2025-01-02T03-04-05-678Z
+_ASSET_FILE_TIMESTAMP_LEN = 24
+
+def _asset_tag_from_file_name(file_name_without_ext: str) -> str:
+    """
+    assetTagId from an uploaded file name (<assetTagId>-<timestamp>).
+    Falls back to the part before the first '-' when there is no timestamp suffix.
+    """
+    ts = file_name_without_ext[-_ASSET_FILE_TIMESTAMP_LEN:]
+    tag_end = len(file_name_without_ext) - _ASSET_FILE_TIMESTAMP_LEN - 1
+    # Fixed-width suffix, so check the separators and digits by position
+    if (
+        tag_end >= 0
+        and file_name_without_ext[tag_end] == '-'
+        and ts[4] == ts[7] == ts[13] == ts[16] == ts[19] == '-'
+        and ts[10] == 'T'
+        and ts[23] == 'Z'
+        and ts.startswith('20')
+        and (ts[:4] + ts[5:7] + ts[8:10] + ts[11:13] + ts[14:16] + ts[17:19] + ts[20:23]).isdecimal()
+    ):
+        return file_name_without_ext[:tag_end]
+    return file_name_without_ext.split('-', 1)[0]
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_url(url: str) -> str:
+    """URL without query parameters and fragment, for matching storage URLs to DB rows"""
+    try:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+    except Exception:
+        return url.split('?')[0].split('#')[0]
+
+_SUPABASE_PUBLIC_URL_RE = re.compile(r'/storage/v1/object/public/([^/]+)/(.+)')
+
+def _supabase_storage_location(url: str) -> Optional[Tuple[str, str, str]]:
+    """(bucket, folder path, file name) for a public Supabase storage URL, else None"""
+    if 'supabase.co/storage/v1/object/public' not in url:
+        return None
+    url_match = _SUPABASE_PUBLIC_URL_RE.search(url)
+    if not url_match:
+        return None
+    bucket, existing_path = url_match.groups()
+    folder_path, _, file_name = existing_path.rpartition('/')
+    return bucket, folder_path, file_name
+
+# Search fields matched with a plain case-insensitive "contains" on the asset column
+_SIMPLE_CONTAINS_FIELDS = frozenset({
+    'assetTagId', 'description', 'brand', 'model', 'serialNo', 'owner',
+    'issuedTo', 'department', 'site', 'location', 'status', 'purchasedFrom',
+    'additionalInformation', 'xeroAssetNo', 'pbiNumber', 'poNumber',
+    'paymentVoucherNumber', 'assetType', 'remarks', 'qr', 'oldAssetTag',
+    'depreciationMethod',
+})
+
+# "relation.field" -> (relation, field) for to-one relations
+_RELATION_CONTAINS_FIELDS = {
+    'category.name': ('category', 'name'),
+    'subCategory.name': ('subCategory', 'name'),
+}
+
+# "relation.field" -> (relation, field) for to-many relations matched with "some"
+_RELATION_SOME_CONTAINS_FIELDS = {
+    'auditHistory.auditType': ('auditHistory', 'auditType'),
+    'auditHistory.auditor': ('auditHistory', 'auditor'),
+}
+
+# "relation.field" -> (relation, field) for date fields, matched against the whole searched day
+_DATE_RANGE_FIELDS = {
+    'checkouts.checkoutDate': ('checkouts', 'checkoutDate'),
+    'checkouts.expectedReturnDate': ('checkouts', 'expectedReturnDate'),
+    'auditHistory.auditDate': ('auditHistory', 'auditDate'),
+}
+
+# Fields searched when the client doesn't pass searchFields
+_DEFAULT_SEARCH_FIELDS = (
+    'assetTagId', 'description', 'brand', 'model', 'serialNo', 'owner',
+    'issuedTo', 'department', 'site', 'location'
+)
+
 def build_search_conditions(search: str, search_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """Build search conditions for assets"""
-    conditions = []
+    fields_to_search = search_fields or _DEFAULT_SEARCH_FIELDS
+    contains = {"contains": search, "mode": "insensitive"}
     
-    # Default fields to search if not specified
-    fields_to_search = search_fields or [
-        'assetTagId', 'description', 'brand', 'model', 'serialNo', 'owner',
-        'issuedTo', 'department', 'site', 'location'
-    ]
+    # Plain column matches make up most of the list, so build them in one pass
+    conditions = [{field: contains} for field in fields_to_search if field in _SIMPLE_CONTAINS_FIELDS]
     
-    for field in fields_to_search:
-        if field == 'assetTagId':
-            conditions.append({"assetTagId": {"contains": search, "mode": "insensitive"}})
-        elif field == 'description':
-            conditions.append({"description": {"contains": search, "mode": "insensitive"}})
-        elif field == 'brand':
-            conditions.append({"brand": {"contains": search, "mode": "insensitive"}})
-        elif field == 'model':
-            conditions.append({"model": {"contains": search, "mode": "insensitive"}})
-        elif field == 'serialNo':
-            conditions.append({"serialNo": {"contains": search, "mode": "insensitive"}})
-        elif field == 'owner':
-            conditions.append({"owner": {"contains": search, "mode": "insensitive"}})
-        elif field == 'issuedTo':
-            conditions.append({"issuedTo": {"contains": search, "mode": "insensitive"}})
-        elif field == 'department':
-            conditions.append({"department": {"contains": search, "mode": "insensitive"}})
-        elif field == 'site':
-            conditions.append({"site": {"contains": search, "mode": "insensitive"}})
-        elif field == 'location':
-            conditions.append({"location": {"contains": search, "mode": "insensitive"}})
-        elif field == 'category.name':
-            conditions.append({"category": {"name": {"contains": search, "mode": "insensitive"}}})
-        elif field == 'subCategory.name':
-            conditions.append({"subCategory": {"name": {"contains": search, "mode": "insensitive"}}})
-        elif field == 'status':
-            conditions.append({"status": {"contains": search, "mode": "insensitive"}})
-        elif field == 'purchasedFrom':
-            conditions.append({"purchasedFrom": {"contains": search, "mode": "insensitive"}})
-        elif field == 'additionalInformation':
-            conditions.append({"additionalInformation": {"contains": search, "mode": "insensitive"}})
-        elif field == 'xeroAssetNo':
-            conditions.append({"xeroAssetNo": {"contains": search, "mode": "insensitive"}})
-        elif field == 'pbiNumber':
-            conditions.append({"pbiNumber": {"contains": search, "mode": "insensitive"}})
-        elif field == 'poNumber':
-            conditions.append({"poNumber": {"contains": search, "mode": "insensitive"}})
-        elif field == 'paymentVoucherNumber':
-            conditions.append({"paymentVoucherNumber": {"contains": search, "mode": "insensitive"}})
-        elif field == 'assetType':
-            conditions.append({"assetType": {"contains": search, "mode": "insensitive"}})
-        elif field == 'remarks':
-            conditions.append({"remarks": {"contains": search, "mode": "insensitive"}})
-        elif field == 'qr':
-            conditions.append({"qr": {"contains": search, "mode": "insensitive"}})
-        elif field == 'oldAssetTag':
-            conditions.append({"oldAssetTag": {"contains": search, "mode": "insensitive"}})
-        elif field == 'depreciationMethod':
-            conditions.append({"depreciationMethod": {"contains": search, "mode": "insensitive"}})
-        elif field == 'checkouts.checkoutDate':
-            search_date = parse_date(search)
-            if search_date:
-                start_of_day = search_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_of_day = search_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-                conditions.append({
-                    "checkouts": {
-                        "some": {
-                            "checkoutDate": {
-                                "gte": start_of_day,
-                                "lte": end_of_day
-                            }
-                        }
-                    }
-                })
-        elif field == 'checkouts.expectedReturnDate':
-            search_date = parse_date(search)
-            if search_date:
-                start_of_day = search_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_of_day = search_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-                conditions.append({
-                    "checkouts": {
-                        "some": {
-                            "expectedReturnDate": {
-                                "gte": start_of_day,
-                                "lte": end_of_day
-                            }
-                        }
-                    }
-                })
-        elif field == 'auditHistory.auditDate':
-            search_date = parse_date(search)
-            if search_date:
-                start_of_day = search_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_of_day = search_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-                conditions.append({
-                    "auditHistory": {
-                        "some": {
-                            "auditDate": {
-                                "gte": start_of_day,
-                                "lte": end_of_day
-                            }
-                        }
-                    }
-                })
-        elif field == 'auditHistory.auditType':
-            conditions.append({"auditHistory": {"some": {"auditType": {"contains": search, "mode": "insensitive"}}}})
-        elif field == 'auditHistory.auditor':
-            conditions.append({"auditHistory": {"some": {"auditor": {"contains": search, "mode": "insensitive"}}}})
+    # Relation fields; the order of OR conditions doesn't matter to Prisma
+    conditions.extend(
+        {_RELATION_CONTAINS_FIELDS[field][0]: {_RELATION_CONTAINS_FIELDS[field][1]: contains}}
+        for field in fields_to_search if field in _RELATION_CONTAINS_FIELDS
+    )
+    conditions.extend(
+        {_RELATION_SOME_CONTAINS_FIELDS[field][0]: {"some": {_RELATION_SOME_CONTAINS_FIELDS[field][1]: contains}}}
+        for field in fields_to_search if field in _RELATION_SOME_CONTAINS_FIELDS
+    )
+    
+    # Date fields match the whole searched day; only parse the term if one is requested
+    date_fields = [_DATE_RANGE_FIELDS[field] for field in fields_to_search if field in _DATE_RANGE_FIELDS]
+    if date_fields:
+        search_date = parse_date(search)
+        if search_date:
+            day_range = {
+                "gte": search_date.replace(hour=0, minute=0, second=0, microsecond=0),
+                "lte": search_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+            }
+            conditions.extend({relation: {"some": {column: day_range}}} for relation, column in date_fields)
     
     # Add employee search if not filtering by specific fields or if employee fields are included
     if not search_fields or any(f for f in search_fields if 'employee' in f):
@@ -323,6 +458,48 @@ def build_where_clause(
     
     return where_clause
 
+async def summarize_assets(where_clause: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Totals for assets matching where_clause, from a single group_by on status:
+    count and cost sum overall, plus the Available / Checked out breakdown
+    (status matched case-insensitively, like the list filters).
+    The breakdown ignores any status filter in where_clause, as the separate
+    per-status counts used to; the totals still respect it.
+    """
+    status_filter = where_clause.get("status")
+    filtered_status = status_filter["equals"].lower() if status_filter else None
+    
+    groups = await prisma.assets.group_by(
+        by=["status"],
+        where={key: value for key, value in where_clause.items() if key != "status"},
+        sum={"cost": True},
+        count=True
+    )
+    
+    totals = {
+        "totalAssets": 0,
+        "totalValue": 0.0,
+        "availableAssets": 0,
+        "checkedOutAssets": 0,
+        "checkedOutAssetsValue": 0.0,
+    }
+    for row in groups:
+        count = row.get("_count", {}).get("_all", 0)
+        value = float(row['_sum']['cost']) if row.get('_sum') and row['_sum'].get('cost') else 0.0
+        status_key = (row.get('status') or '').lower()
+        
+        if filtered_status is None or status_key == filtered_status:
+            totals["totalAssets"] += count
+            totals["totalValue"] += value
+        
+        if status_key == 'available':
+            totals["availableAssets"] += count
+        elif status_key == 'checked out':
+            totals["checkedOutAssets"] += count
+            totals["checkedOutAssetsValue"] += value
+    
+    return totals
+
 
 @router.post("/generate-tag", response_model=GenerateAssetTagResponse)
 async def generate_asset_tag(
@@ -335,10 +512,8 @@ async def generate_asset_tag(
         if not user_id:
             raise HTTPException(status_code=401, detail="Unauthorized")
         
-        # Get company info to extract initials
-        company_info = await prisma.companyinfo.find_first(
-            order={"createdAt": "desc"}
-        )
+        # Get company info to extract initials (served from the shared in-process cache)
+        company_info = (await get_company_info_cached(prisma)).companyInfo
         
         # Get company initials (e.g., "Go Codes" -> "GC")
         company_suffix = get_company_initials(company_info.companyName if company_info else None)
@@ -349,28 +524,27 @@ async def generate_asset_tag(
         else:
             year = str(datetime.now().year)[-2:]
         
-        # Generate unique tag (retry up to 100 times)
-        attempts = 0
-        generated_tag = ''
-        is_unique = False
+        # Generate unique tag (up to 100 candidates, checked in batches with one query each)
+        generated_tag = None
         
-        while not is_unique and attempts < 100:
-            # Generate 6-digit random number (000000-999999)
-            random_num = str(random.randint(0, 999999)).zfill(6)
-            
-            # Build tag: YY-XXXXXX[S]-[COMPANY_INITIALS]
-            generated_tag = f"{year}-{random_num}{request.subCategoryLetter}-{company_suffix}"
+        for _ in range(TAG_MAX_ATTEMPTS // TAG_CANDIDATE_BATCH_SIZE):
+            # Build tags: YY-XXXXXX[S]-[COMPANY_INITIALS] with a 6-digit random number (000000-999999)
+            candidates = list(dict.fromkeys(
+                f"{year}-{str(random.randint(0, 999999)).zfill(6)}{request.subCategoryLetter}-{company_suffix}"
+                for _ in range(TAG_CANDIDATE_BATCH_SIZE)
+            ))
             
-            # Check if tag exists
-            exists = await prisma.assets.find_unique(
-                where={"assetTagId": generated_tag}
+            # Check which candidates already exist
+            existing = await prisma.assets.find_many(
+                where={"assetTagId": {"in": candidates}}
             )
+            taken = {asset.assetTagId for asset in existing}
             
-            if not exists:
-                is_unique = True
-            attempts += 1
+            generated_tag = next((tag for tag in candidates if tag not in taken), None)
+            if generated_tag:
+                break
         
-        if not is_unique:
+        if not generated_tag:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to generate unique asset tag after 100 attempts"
@@ -427,61 +601,21 @@ async def get_assets(
         
         # Check if unique statuses are requested
         if statuses:
-            # Fetch all matching assets and extract unique statuses
-            # Prisma Python doesn't support select, so we fetch all fields
-            assets_with_status = await prisma.assets.find_many(
+            # Let the database deduplicate: one row per distinct status
+            status_groups = await prisma.assets.group_by(
+                by=["status"],
                 where=where_clause
             )
-            unique_statuses = sorted(list(set(
-                asset.status for asset in assets_with_status if asset.status
-            )))
+            unique_statuses = sorted(
+                row['status'] for row in status_groups if row.get('status')
+            )
             return StatusesResponse(statuses=unique_statuses)
         
         # Check if summary is requested
         if summary:
-            total_assets = await prisma.assets.count(where=where_clause)
-            # Fetch all matching assets to calculate sum (Prisma Python doesn't support select)
-            assets_for_sum = await prisma.assets.find_many(
-                where=where_clause
-            )
-            total_value = sum(
-                float(asset.cost) if asset.cost is not None else 0.0
-                for asset in assets_for_sum
-            )
-            available_assets = await prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Available", "mode": "insensitive"}
-                }
-            )
-            checked_out_assets = await prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Checked out", "mode": "insensitive"}
-                }
-            )
-            
-            # Calculate value of checked out assets only
-            checked_out_where = {
-                **where_clause,
-                "status": {"equals": "Checked out", "mode": "insensitive"}
-            }
-            checked_out_assets_for_value = await prisma.assets.find_many(
-                where=checked_out_where
-            )
-            checked_out_value = sum(
-                float(asset.cost) if asset.cost is not None else 0.0
-                for asset in checked_out_assets_for_value
-            )
-            
+            totals = await summarize_assets(where_clause)
             return SummaryResponse(
-                summary=SummaryInfo(
-                    totalAssets=total_assets,
-                    totalValue=total_value,
-                    availableAssets=available_assets,
-                    checkedOutAssets=checked_out_assets,
-                    checkedOutAssetsValue=checked_out_value
-                )
+                summary=SummaryInfo(**totals)
             )
         
         # Optimize includes for deleted assets - they don't need heavy relations
@@ -494,11 +628,15 @@ async def get_assets(
         
         # Only include heavy relations for non-deleted assets or when specifically requested
         if not includeDeleted or withMaintenance:
+            # Only the latest checkout/lease and the last 5 audits are shown in the list,
+            # so let the database order and limit them per asset
             include_dict.update({
                 "checkouts": {
                     "include": {
                         "employeeUser": True
-                    }
+                    },
+                    "order_by": {"checkoutDate": "desc"},
+                    "take": 1
                 },
                 "leases": {
                     "where": {
@@ -507,11 +645,13 @@ async def get_assets(
                             {"leaseEndDate": {"gte": datetime.now()}}
                         ]
                     },
-                    "include": {
-                        "returns": True
-                    }
+                    "order_by": {"leaseStartDate": "desc"},
+                    "take": 1
+                },
+                "auditHistory": {
+                    "order_by": {"auditDate": "desc"},
+                    "take": 5
                 },
-                "auditHistory": True,
             })
             if withMaintenance:
                 include_dict["maintenances"] = {
@@ -524,9 +664,11 @@ async def get_assets(
                     }
                 }
         
-        # Get total count and assets in parallel
-        total_count, assets_data = await asyncio.gather(
-            prisma.assets.count(where=where_clause),
+        # Get totals/status breakdown and the page of assets in parallel.
+        # totalAssets follows the filters (it drives pagination); the Available /
+        # Checked out counts ignore the status filter, as the summary cards expect
+        totals, assets_data = await asyncio.gather(
+            summarize_assets(where_clause),
             prisma.assets.find_many(
                 where=where_clause,
                 include=include_dict,
@@ -536,56 +678,52 @@ async def get_assets(
             )
         )
         
-        # Get image counts for all assets - optimized batch query
-        assets_with_image_count = []
+        # Get image counts for all assets - counted in the database with one group_by
         image_counts = {}
         if assets_data:
             asset_tag_ids = [asset.assetTagId for asset in assets_data]
-            # Batch fetch all image counts at once instead of individual queries
-            if asset_tag_ids:
-                all_images = await prisma.assetsimage.find_many(
-                    where={"assetTagId": {"in": asset_tag_ids}}
-                )
-                # Count images per asset tag ID
-                for asset_tag_id in asset_tag_ids:
-                    image_counts[asset_tag_id] = sum(1 for img in all_images if img.assetTagId == asset_tag_id)
+            image_groups = await prisma.assetsimage.group_by(
+                by=["assetTagId"],
+                where={"assetTagId": {"in": asset_tag_ids}},
+                count=True
+            )
+            image_counts = {
+                row['assetTagId']: row.get("_count", {}).get("_all", 0)
+                for row in image_groups
+            }
         
-        # Convert to Asset models
+        # Convert to Asset models - rows come from the typed Prisma client, so skip
+        # re-validating them field by field (FastAPI still validates the response)
         assets = []
         for asset_data in assets_data:
             try:
                 # Convert related data
                 category_info = None
                 if asset_data.category:
-                    category_info = CategoryInfo(
+                    category_info = CategoryInfo.model_construct(
                         id=str(asset_data.category.id),
                         name=str(asset_data.category.name)
                     )
                 
                 sub_category_info = None
                 if asset_data.subCategory:
-                    sub_category_info = SubCategoryInfo(
+                    sub_category_info = SubCategoryInfo.model_construct(
                         id=str(asset_data.subCategory.id),
                         name=str(asset_data.subCategory.name)
                     )
                 
                 checkouts_list = []
                 if hasattr(asset_data, 'checkouts') and asset_data.checkouts:
-                    # Sort by checkoutDate descending and take only the first one
-                    sorted_checkouts = sorted(
-                        asset_data.checkouts,
-                        key=lambda x: x.checkoutDate if x.checkoutDate else datetime.min,
-                        reverse=True
-                    )[:1]
-                    for checkout in sorted_checkouts:
+                    # Already limited to the latest checkout by the query
+                    for checkout in asset_data.checkouts:
                         employee_info = None
                         if checkout.employeeUser:
-                            employee_info = EmployeeInfo(
+                            employee_info = EmployeeInfo.model_construct(
                                 id=str(checkout.employeeUser.id),
                                 name=str(checkout.employeeUser.name),
                                 email=str(checkout.employeeUser.email)
                             )
-                        checkouts_list.append(CheckoutInfo(
+                        checkouts_list.append(CheckoutInfo.model_construct(
                             id=str(checkout.id),
                             checkoutDate=checkout.checkoutDate,
                             expectedReturnDate=checkout.expectedReturnDate,
@@ -594,19 +732,9 @@ async def get_assets(
                 
                 leases_list = []
                 if hasattr(asset_data, 'leases') and asset_data.leases:
-                    # Sort by leaseStartDate descending and take only the first one
-                    sorted_leases = sorted(
-                        asset_data.leases,
-                        key=lambda x: x.leaseStartDate if x.leaseStartDate else datetime.min,
-                        reverse=True
-                    )[:1]
-                    for lease in sorted_leases:
-                        # Get first return if exists
-                        first_return = None
-                        if lease.returns and len(lease.returns) > 0:
-                            first_return = lease.returns[0]
-                        
-                        leases_list.append(LeaseInfo(
+                    # Already limited to the latest active lease by the query
+                    for lease in asset_data.leases:
+                        leases_list.append(LeaseInfo.model_construct(
                             id=str(lease.id),
                             leaseStartDate=lease.leaseStartDate,
                             leaseEndDate=lease.leaseEndDate,
@@ -615,21 +743,16 @@ async def get_assets(
                 
                 audit_history_list = []
                 if hasattr(asset_data, 'auditHistory') and asset_data.auditHistory:
-                    # Sort by auditDate descending and take only the first 5
-                    sorted_audits = sorted(
-                        asset_data.auditHistory,
-                        key=lambda x: x.auditDate if x.auditDate else datetime.min,
-                        reverse=True
-                    )[:5]
-                    for audit in sorted_audits:
-                        audit_history_list.append(AuditHistoryInfo(
+                    # Already limited to the 5 most recent audits by the query
+                    for audit in asset_data.auditHistory:
+                        audit_history_list.append(AuditHistoryInfo.model_construct(
                             id=str(audit.id),
                             auditDate=audit.auditDate,
                             auditType=audit.auditType,
                             auditor=audit.auditor
                         ))
                 
-                asset = Asset(
+                asset = Asset.model_construct(
                     id=str(asset_data.id),
                     assetTagId=str(asset_data.assetTagId),
                     description=str(asset_data.description),
@@ -680,30 +803,7 @@ async def get_assets(
                 logger.error(f"Error creating Asset model: {type(e).__name__}: {str(e)}", exc_info=True)
                 continue
         
-        # Calculate summary statistics in parallel
-        # Fetch all matching assets to calculate sum (Prisma Python doesn't support select)
-        assets_for_sum, available_assets, checked_out_assets = await asyncio.gather(
-            prisma.assets.find_many(
-                where=where_clause
-            ),
-            prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Available", "mode": "insensitive"}
-                }
-            ),
-            prisma.assets.count(
-                where={
-                    **where_clause,
-                    "status": {"equals": "Checked out", "mode": "insensitive"}
-                }
-            )
-        )
-        
-        total_value = sum(
-            float(asset.cost) if asset.cost is not None else 0.0
-            for asset in assets_for_sum
-        )
+        total_count = totals["totalAssets"]
         total_pages = (total_count + pageSize - 1) // pageSize if total_count > 0 else 0
         
         return AssetsResponse(
@@ -716,9 +816,9 @@ async def get_assets(
             ),
             summary=SummaryInfo(
                 totalAssets=total_count,
-                totalValue=total_value,
-                availableAssets=available_assets,
-                checkedOutAssets=checked_out_assets
+                totalValue=totals["totalValue"],
+                availableAssets=totals["availableAssets"],
+                checkedOutAssets=totals["checkedOutAssets"]
             )
         )
     
@@ -853,6 +953,12 @@ async def generate_accountability_form_pdf(
         )
 
 
+async def _resolve_asset(asset_id: str):
+    """Look up an asset by UUID or, failing that, by its (non-deleted) assetTagId"""
+    if is_uuid(asset_id):
+        return await prisma.assets.find_unique(where={"id": asset_id})
+    return await prisma.assets.find_first(where={"assetTagId": asset_id, "isDeleted": False})
+
 @router.get("/{asset_id}/checkout")
 async def get_asset_checkouts(
     asset_id: str = Path(..., description="Asset ID (UUID) or assetTagId"),
@@ -860,15 +966,8 @@ async def get_asset_checkouts(
 ):
     """Get all checkout records for a specific asset"""
     try:
-        # Check if it's a UUID or assetTagId
-        is_id_uuid = is_uuid(asset_id)
-        
-        # Verify asset exists
-        if is_id_uuid:
-            asset = await prisma.assets.find_unique(where={"id": asset_id})
-        else:
-            asset = await prisma.assets.find_first(where={"assetTagId": asset_id, "isDeleted": False})
-        
+        # Verify asset exists (asset_id may be a UUID or an assetTagId)
+        asset = await _resolve_asset(asset_id)
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
         
@@ -877,45 +976,44 @@ async def get_asset_checkouts(
             where={"assetId": asset.id},
             include={
                 "employeeUser": True,
-                "checkins": True
+                # Only the latest checkin per checkout is returned
+                "checkins": {
+                    "order_by": {"checkinDate": "desc"},
+                    "take": 1
+                }
             },
             order={"checkoutDate": "desc"}
         )
         
-        # Format checkouts for response
-        checkouts = []
-        for checkout in checkouts_data:
-            # Sort checkins by date descending and take the first one
-            sorted_checkins = sorted(
-                checkout.checkins or [],
-                key=lambda x: x.checkinDate if hasattr(x, 'checkinDate') else datetime.min,
-                reverse=True
-            )[:1]
-            
-            checkout_dict = {
-                "id": str(checkout.id),
-                "assetId": str(checkout.assetId),
-                "employeeUserId": str(checkout.employeeUserId) if checkout.employeeUserId else None,
-                "checkoutDate": checkout.checkoutDate.isoformat() if hasattr(checkout.checkoutDate, 'isoformat') else str(checkout.checkoutDate),
-                "expectedReturnDate": checkout.expectedReturnDate.isoformat() if checkout.expectedReturnDate and hasattr(checkout.expectedReturnDate, 'isoformat') else (str(checkout.expectedReturnDate) if checkout.expectedReturnDate else None),
-                "createdAt": checkout.createdAt.isoformat() if hasattr(checkout.createdAt, 'isoformat') else str(checkout.createdAt),
-                "updatedAt": checkout.updatedAt.isoformat() if hasattr(checkout.updatedAt, 'isoformat') else str(checkout.updatedAt),
+        # Format checkouts for response. Datetimes are left as-is: ORJSONResponse
+        # serializes them natively (same ISO format as .isoformat())
+        checkouts = [
+            {
+                "id": checkout.id,
+                "assetId": checkout.assetId,
+                "employeeUserId": checkout.employeeUserId or None,
+                "checkoutDate": checkout.checkoutDate,
+                "expectedReturnDate": checkout.expectedReturnDate or None,
+                "createdAt": checkout.createdAt,
+                "updatedAt": checkout.updatedAt,
                 "employeeUser": {
-                    "id": str(checkout.employeeUser.id),
-                    "name": str(checkout.employeeUser.name),
-                    "email": str(checkout.employeeUser.email)
+                    "id": checkout.employeeUser.id,
+                    "name": checkout.employeeUser.name,
+                    "email": checkout.employeeUser.email
                 } if checkout.employeeUser else None,
                 "checkins": [
                     {
-                        "id": str(c.id),
-                        "checkinDate": c.checkinDate.isoformat() if hasattr(c.checkinDate, 'isoformat') else str(c.checkinDate),
+                        "id": c.id,
+                        "checkinDate": c.checkinDate,
                     }
-                    for c in sorted_checkins
+                    for c in checkout.checkins or []
                 ]
             }
-            checkouts.append(checkout_dict)
+            for checkout in checkouts_data
+        ]
         
-        return {"checkouts": checkouts}
+        # Returned directly so FastAPI skips jsonable_encoder on every row
+        return ORJSONResponse({"checkouts": checkouts})
     
     except HTTPException:
         raise
@@ -930,15 +1028,8 @@ async def get_asset_history(
 ):
     """Get all history logs for a specific asset"""
     try:
-        # Check if it's a UUID or assetTagId
-        is_id_uuid = is_uuid(asset_id)
-        
-        # Verify asset exists
-        if is_id_uuid:
-            asset = await prisma.assets.find_unique(where={"id": asset_id})
-        else:
-            asset = await prisma.assets.find_first(where={"assetTagId": asset_id, "isDeleted": False})
-        
+        # Verify asset exists (asset_id may be a UUID or an assetTagId)
+        asset = await _resolve_asset(asset_id)
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
         
@@ -948,25 +1039,25 @@ async def get_asset_history(
             order={"eventDate": "desc"}
         )
         
-        # Format logs for response
-        logs = []
-        for log in logs_data:
-            log_dict = {
-                "id": str(log.id),
-                "assetId": str(log.assetId),
+        # Format logs for response (datetimes are serialized by ORJSONResponse)
+        logs = [
+            {
+                "id": log.id,
+                "assetId": log.assetId,
                 "eventType": log.eventType,
                 "field": log.field,
                 "changeFrom": log.changeFrom,
                 "changeTo": log.changeTo,
                 "actionBy": log.actionBy,
-                "eventDate": log.eventDate.isoformat() if hasattr(log.eventDate, 'isoformat') else str(log.eventDate),
-                "createdAt": log.createdAt.isoformat() if hasattr(log.createdAt, 'isoformat') else str(log.createdAt),
-                "notes": log.notes if hasattr(log, 'notes') else None,
-                "status": log.status if hasattr(log, 'status') else None,
+                "eventDate": log.eventDate,
+                "createdAt": log.createdAt,
+                "notes": getattr(log, 'notes', None),
+                "status": getattr(log, 'status', None),
             }
-            logs.append(log_dict)
+            for log in logs_data
+        ]
         
-        return {"logs": logs}
+        return ORJSONResponse({"logs": logs})
     
     except HTTPException:
         raise
@@ -974,6 +1065,68 @@ async def get_asset_history(
         logger.error(f"Error fetching history logs: {type(e).__name__}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch history logs")
 
+
+# Lookup tables that imports create missing rows in: Prisma model -> table name.
+# All of them have a unique "name" column.
+_IMPORT_LOOKUP_TABLES = {
+    "category": "categories",
+    "assetslocation": "assets_locations",
+    "assetsdepartment": "assets_departments",
+    "assetssite": "assets_sites",
+}
+
+
+async def upsert_lookup_names(model: str, names) -> Dict[str, str]:
+    """
+    Map names to ids in a lookup table, creating the missing rows.
+    Runs as a single INSERT ... ON CONFLICT statement instead of find/create/find.
+    """
+    if not names:
+        return {}
+    
+    table = _IMPORT_LOOKUP_TABLES[model]
+    names_list = list(names)
+    description = "Auto-created during import"
+    
+    try:
+        # "inserted" returns the new rows; the outer SELECT sees the table as it was
+        # before the insert, so it returns the rows that already existed
+        rows = await prisma.query_raw(
+            f"""
+            WITH inserted AS (
+                INSERT INTO "{table}" (id, name, description, updated_at)
+                SELECT gen_random_uuid()::text, name, $2, now()
+                FROM unnest($1::text[]) AS name
+                ON CONFLICT (name) DO NOTHING
+                RETURNING id, name
+            )
+            SELECT id, name FROM inserted
+            UNION ALL
+            SELECT id, name FROM "{table}" WHERE name = ANY($1::text[])
+            """,
+            names_list,
+            description
+        )
+        return {row["name"]: str(row["id"]) for row in rows}
+    except Exception as e:
+        logger.warning(f"Error upserting {table}: {e}, falling back to individual creates")
+    
+    # Fallback: create one by one
+    delegate = getattr(prisma, model)
+    name_map = {row.name: str(row.id) for row in await delegate.find_many(where={"name": {"in": names_list}})}
+    for name in names_list:
+        if name in name_map:
+            continue
+        try:
+            created = await delegate.create(data={"name": name, "description": description})
+            name_map[name] = str(created.id)
+        except Exception:
+            existing = await delegate.find_first(where={"name": name})
+            if existing:
+                name_map[name] = str(existing.id)
+    return name_map
+
+
 @router.post("/import")
 async def import_assets(
     request: Request,
@@ -1010,13 +1163,16 @@ async def import_assets(
             raise HTTPException(status_code=400, detail="Invalid request body. Expected an array of assets.")
         
         # Validate that assets have required fields
-        invalid_assets = [asset for asset in assets if not asset or not isinstance(asset, dict) or not asset.get("assetTagId") or (isinstance(asset.get("assetTagId"), str) and asset.get("assetTagId", "").strip() == "")]
+        invalid_indices = [
+            index + 2  # +2 because row 1 is header
+            for index, asset in enumerate(assets)
+            if not asset or not isinstance(asset, dict) or not asset.get("assetTagId") or (isinstance(asset.get("assetTagId"), str) and asset.get("assetTagId", "").strip() == "")
+        ]
         
-        if invalid_assets:
-            invalid_indices = [assets.index(asset) + 2 for asset in invalid_assets]  # +2 because row 1 is header
+        if invalid_indices:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid data format: {len(invalid_assets)} row(s) are missing required 'Asset Tag ID' field. Please ensure your Excel file has the correct column headers.",
+                detail=f"Invalid data format: {len(invalid_indices)} row(s) are missing required 'Asset Tag ID' field. Please ensure your Excel file has the correct column headers.",
                 headers={"X-Invalid-Rows": ",".join(map(str, invalid_indices))}
             )
         
@@ -1028,9 +1184,19 @@ async def import_assets(
         unique_sites = set()
         subcategory_to_category_map = {}
         
-        for asset in assets:
-            category_name = asset.get("category", "").strip() if asset.get("category") else None
-            subcategory_name = asset.get("subCategory", "").strip() if asset.get("subCategory") else None
+        def normalize_names(asset: Dict[str, Any]) -> Dict[str, Optional[str]]:
+            """Stripped lookup names of a row, None when missing or blank"""
+            return {
+                field: (asset.get(field) or "").strip() or None
+                for field in ("category", "subCategory", "location", "department", "site")
+            }
+        
+        # Normalize each row once; used for the unique sets and the asset rows below
+        normalized_names = [normalize_names(asset) for asset in assets]
+        
+        for names in normalized_names:
+            category_name = names["category"]
+            subcategory_name = names["subCategory"]
             
             if category_name:
                 unique_categories.add(category_name)
@@ -1039,86 +1205,47 @@ async def import_assets(
                 if category_name and subcategory_name not in subcategory_to_category_map:
                     subcategory_to_category_map[subcategory_name] = category_name
             
-            if asset.get("location"):
-                unique_locations.add(asset.get("location", "").strip())
-            if asset.get("department"):
-                unique_departments.add(asset.get("department", "").strip())
-            if asset.get("site"):
-                unique_sites.add(asset.get("site", "").strip())
-        
-        # Batch create categories
-        category_map = {}
-        if unique_categories:
-            category_names_list = list(unique_categories)
-            existing_categories = await prisma.category.find_many(
-                where={"name": {"in": category_names_list}}
-            )
-            for cat in existing_categories:
-                category_map[cat.name] = str(cat.id)
-            
-            missing_categories = [name for name in category_names_list if name not in category_map]
-            if missing_categories:
-                # Batch create missing categories
-                try:
-                    categories_to_create = [
-                        {"name": name, "description": "Auto-created during import"}
-                        for name in missing_categories
-                    ]
-                    await prisma.category.create_many(
-                        data=categories_to_create,
-                        skip_duplicates=True
-                    )
-                    # Fetch all created categories (including ones that might have existed)
-                    created_categories = await prisma.category.find_many(
-                        where={"name": {"in": missing_categories}}
-                    )
-                    for cat in created_categories:
-                        category_map[cat.name] = str(cat.id)
-                except Exception as e:
-                    logger.warning(f"Error batch creating categories: {e}, falling back to individual creates")
-                    # Fallback: create one by one
-                    for name in missing_categories:
-                        try:
-                            new_cat = await prisma.category.create(
-                                data={"name": name, "description": "Auto-created during import"}
-                            )
-                            category_map[name] = str(new_cat.id)
-                        except Exception:
-                            existing = await prisma.category.find_first(where={"name": name})
-                            if existing:
-                                category_map[name] = str(existing.id)
+            if names["location"]:
+                unique_locations.add(names["location"])
+            if names["department"]:
+                unique_departments.add(names["department"])
+            if names["site"]:
+                unique_sites.add(names["site"])
+        
+        # Get or create categories, locations, departments and sites (one upsert statement
+        # each). They don't depend on each other, so run them concurrently.
+        category_map, location_map, department_map, site_map = await asyncio.gather(
+            upsert_lookup_names("category", unique_categories),
+            upsert_lookup_names("assetslocation", unique_locations),
+            upsert_lookup_names("assetsdepartment", unique_departments),
+            upsert_lookup_names("assetssite", unique_sites)
+        )
         
-        # Batch create subcategories
+        # Batch create subcategories (after categories, since they need the parent ids)
         subcategory_map = {}
         if unique_subcategories:
-            subcategory_names_list = list(unique_subcategories)
             existing_subcategories = await prisma.subcategory.find_many(
-                where={"name": {"in": subcategory_names_list}},
-                include={"category": True}
+                where={"name": {"in": list(unique_subcategories)}}
             )
             
             for subcat in existing_subcategories:
                 expected_parent = subcategory_to_category_map.get(subcat.name)
-                if not expected_parent or subcat.category.name == expected_parent:
+                # Category names are unique, so comparing ids against category_map
+                # matches the parent by name without joining the category row
+                if not expected_parent or subcat.categoryId == category_map.get(expected_parent):
                     subcategory_map[subcat.name] = str(subcat.id)
             
-            missing_subcategories = [name for name in subcategory_names_list if name not in subcategory_map]
+            missing_subcategories = unique_subcategories.difference(subcategory_map)
             if missing_subcategories:
-                # Group by parent category
-                subcategories_by_category = {}
+                # Group by parent category (sets, so a name is never sent twice)
+                subcategories_by_category: Dict[str, set] = defaultdict(set)
                 for subcat_name in missing_subcategories:
                     parent_category_name = subcategory_to_category_map.get(subcat_name)
                     if parent_category_name and parent_category_name in category_map:
-                        category_id = category_map[parent_category_name]
-                        if category_id not in subcategories_by_category:
-                            subcategories_by_category[category_id] = []
-                        subcategories_by_category[category_id].append(subcat_name)
+                        subcategories_by_category[category_map[parent_category_name]].add(subcat_name)
                     else:
                         # Use default category
-                        default_key = "default"
-                        if default_key not in subcategories_by_category:
-                            subcategories_by_category[default_key] = []
-                        subcategories_by_category[default_key].append(subcat_name)
+                        subcategories_by_category["default"].add(subcat_name)
                 
                 # Get or create default category
                 default_category_id = None
@@ -1130,163 +1257,52 @@ async def import_assets(
                         )
                     default_category_id = str(default_category.id)
                 
-                # Batch create subcategories by category
-                for category_id_or_default, subcat_names in subcategories_by_category.items():
-                    parent_id = default_category_id if category_id_or_default == "default" else category_id_or_default
-                    if parent_id and subcat_names:
-                        try:
-                            subcategories_to_create = [
-                                {
-                                    "name": subcat_name,
-                                    "description": "Auto-created during import",
-                                    "categoryId": parent_id
-                                }
-                                for subcat_name in subcat_names
-                            ]
-                            await prisma.subcategory.create_many(
-                                data=subcategories_to_create,
-                                skip_duplicates=True
-                            )
-                            # Fetch all created subcategories
-                            created_subcats = await prisma.subcategory.find_many(
-                                where={"name": {"in": subcat_names}}
-                            )
-                            for subcat in created_subcats:
-                                subcategory_map[subcat.name] = str(subcat.id)
-                        except Exception as e:
-                            logger.warning(f"Error batch creating subcategories: {e}, falling back to individual creates")
-                            # Fallback: create one by one
-                            for subcat_name in subcat_names:
-                                try:
-                                    new_subcat = await prisma.subcategory.create(
-                                        data={
-                                            "name": subcat_name,
-                                            "description": "Auto-created during import",
-                                            "categoryId": parent_id
-                                        }
-                                    )
-                                    subcategory_map[subcat_name] = str(new_subcat.id)
-                                except Exception:
-                                    existing = await prisma.subcategory.find_first(where={"name": subcat_name})
-                                    if existing:
-                                        subcategory_map[subcat_name] = str(existing.id)
-        
-        # Batch create locations
-        location_map = {}
-        if unique_locations:
-            location_names_list = list(unique_locations)
-            existing_locations = await prisma.assetslocation.find_many(
-                where={"name": {"in": location_names_list}}
-            )
-            for loc in existing_locations:
-                location_map[loc.name] = str(loc.id)
-            
-            missing_locations = [name for name in location_names_list if name not in location_map]
-            if missing_locations:
-                try:
-                    locations_to_create = [
-                        {"name": name, "description": "Auto-created during import"}
-                        for name in missing_locations
-                    ]
-                    await prisma.assetslocation.create_many(
-                        data=locations_to_create,
-                        skip_duplicates=True
-                    )
-                    created_locations = await prisma.assetslocation.find_many(
-                        where={"name": {"in": missing_locations}}
-                    )
-                    for loc in created_locations:
-                        location_map[loc.name] = str(loc.id)
-                except Exception as e:
-                    logger.warning(f"Error batch creating locations: {e}, falling back to individual creates")
-                    for name in missing_locations:
-                        try:
-                            new_loc = await prisma.assetslocation.create(
-                                data={"name": name, "description": "Auto-created during import"}
-                            )
-                            location_map[name] = str(new_loc.id)
-                        except Exception:
-                            existing = await prisma.assetslocation.find_first(where={"name": name})
-                            if existing:
-                                location_map[name] = str(existing.id)
-        
-        # Batch create departments
-        department_map = {}
-        if unique_departments:
-            department_names_list = list(unique_departments)
-            existing_departments = await prisma.assetsdepartment.find_many(
-                where={"name": {"in": department_names_list}}
-            )
-            for dept in existing_departments:
-                department_map[dept.name] = str(dept.id)
-            
-            missing_departments = [name for name in department_names_list if name not in department_map]
-            if missing_departments:
-                try:
-                    departments_to_create = [
-                        {"name": name, "description": "Auto-created during import"}
-                        for name in missing_departments
-                    ]
-                    await prisma.assetsdepartment.create_many(
-                        data=departments_to_create,
-                        skip_duplicates=True
-                    )
-                    created_departments = await prisma.assetsdepartment.find_many(
-                        where={"name": {"in": missing_departments}}
-                    )
-                    for dept in created_departments:
-                        department_map[dept.name] = str(dept.id)
-                except Exception as e:
-                    logger.warning(f"Error batch creating departments: {e}, falling back to individual creates")
-                    for name in missing_departments:
-                        try:
-                            new_dept = await prisma.assetsdepartment.create(
-                                data={"name": name, "description": "Auto-created during import"}
-                            )
-                            department_map[name] = str(new_dept.id)
-                        except Exception:
-                            existing = await prisma.assetsdepartment.find_first(where={"name": name})
-                            if existing:
-                                department_map[name] = str(existing.id)
-        
-        # Batch create sites
-        site_map = {}
-        if unique_sites:
-            site_names_list = list(unique_sites)
-            existing_sites = await prisma.assetssite.find_many(
-                where={"name": {"in": site_names_list}}
-            )
-            for site in existing_sites:
-                site_map[site.name] = str(site.id)
-            
-            missing_sites = [name for name in site_names_list if name not in site_map]
-            if missing_sites:
-                try:
-                    sites_to_create = [
-                        {"name": name, "description": "Auto-created during import"}
-                        for name in missing_sites
-                    ]
-                    await prisma.assetssite.create_many(
-                        data=sites_to_create,
-                        skip_duplicates=True
-                    )
-                    created_sites = await prisma.assetssite.find_many(
-                        where={"name": {"in": missing_sites}}
-                    )
-                    for site in created_sites:
-                        site_map[site.name] = str(site.id)
-                except Exception as e:
-                    logger.warning(f"Error batch creating sites: {e}, falling back to individual creates")
-                    for name in missing_sites:
-                        try:
-                            new_site = await prisma.assetssite.create(
-                                data={"name": name, "description": "Auto-created during import"}
-                            )
-                            site_map[name] = str(new_site.id)
-                        except Exception:
-                            existing = await prisma.assetssite.find_first(where={"name": name})
-                            if existing:
-                                site_map[name] = str(existing.id)
+                # Create all missing subcategories with a single INSERT ... RETURNING
+                # instead of create_many + find_many per parent category
+                subcategories_to_create = [
+                    (subcat_name, default_category_id if category_id_or_default == "default" else category_id_or_default)
+                    for category_id_or_default, subcat_names in subcategories_by_category.items()
+                    for subcat_name in subcat_names
+                ]
+                subcategories_to_create = [(name, parent_id) for name, parent_id in subcategories_to_create if parent_id]
+                if subcategories_to_create:
+                    try:
+                        created_subcats = await prisma.query_raw(
+                            """
+                            INSERT INTO "sub_categories" (id, name, description, category_id, updated_at)
+                            SELECT gen_random_uuid()::text, name, $3, category_id, now()
+                            FROM unnest($1::text[], $2::text[]) AS t(name, category_id)
+                            ON CONFLICT (name) DO NOTHING
+                            RETURNING id, name
+                            """,
+                            [name for name, _ in subcategories_to_create],
+                            [parent_id for _, parent_id in subcategories_to_create],
+                            "Auto-created during import"
+                        )
+                        for subcat in created_subcats:
+                            subcategory_map[subcat["name"]] = str(subcat["id"])
+                    except Exception as e:
+                        logger.warning(f"Error batch creating subcategories: {e}, falling back to individual creates")
+                        # Fallback: create one by one
+                        for subcat_name, parent_id in subcategories_to_create:
+                            try:
+                                new_subcat = await prisma.subcategory.create(
+                                    data={
+                                        "name": subcat_name,
+                                        "description": "Auto-created during import",
+                                        "categoryId": parent_id
+                                    }
+                                )
+                                subcategory_map[subcat_name] = str(new_subcat.id)
+                            except Exception:
+                                existing = await prisma.subcategory.find_first(where={"name": subcat_name})
+                                if existing:
+                                    subcategory_map[subcat_name] = str(existing.id)
+                    
+                    # Subcategory names are unique, so a name that already exists under a
+                    # different parent isn't inserted; reuse the row fetched above
+                    for subcat in existing_subcategories:
+                        subcategory_map.setdefault(subcat.name, str(subcat.id))
         
         # Check for existing assets
         asset_tag_ids = [asset.get("assetTagId") for asset in assets if asset.get("assetTagId") and isinstance(asset.get("assetTagId"), str)]
@@ -1294,54 +1310,32 @@ async def import_assets(
         if not asset_tag_ids:
             raise HTTPException(status_code=400, detail="No valid Asset Tag IDs found in the import file. Please check your Excel file format.")
         
-        existing_assets = await prisma.assets.find_many(
-            where={"assetTagId": {"in": asset_tag_ids}}
+        # Only the tag and the deleted flag are needed, so don't load full asset rows
+        existing_assets = await prisma.query_raw(
+            'SELECT asset_tag_id AS "assetTagId", is_deleted AS "isDeleted" FROM "assets" WHERE asset_tag_id = ANY($1::text[])',
+            asset_tag_ids
         )
         
-        existing_asset_tags = {asset.assetTagId for asset in existing_assets}
-        deleted_asset_tags = {asset.assetTagId for asset in existing_assets if asset.isDeleted}
-        
-        # Helper functions
-        def parse_number(value: Any) -> Optional[float]:
-            if value is None or value == "":
-                return None
-            try:
-                if isinstance(value, str):
-                    value = value.replace(",", "")
-                num = float(value)
-                return num if not (num != num) else None  # Check for NaN
-            except (ValueError, TypeError):
-                return None
-        
-        def parse_boolean(value: Any) -> Optional[bool]:
-            if value is None or value == "":
-                return None
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                lower = value.lower().strip()
-                if lower in ["true", "yes", "1"]:
-                    return True
-                if lower in ["false", "no", "0"]:
-                    return False
-            return bool(value) if value else None
+        # Sets: both are probed once per imported row (here and when building results)
+        existing_asset_tags: Set[str] = {asset["assetTagId"] for asset in existing_assets}
+        deleted_asset_tags: Set[str] = {asset["assetTagId"] for asset in existing_assets if asset["isDeleted"]}
         
         # Prepare data for batch insert
         assets_to_create = []
-        for asset in assets:
+        for asset, names in zip(assets, normalized_names):
             asset_tag_id = asset.get("assetTagId")
             if not asset_tag_id or asset_tag_id in existing_asset_tags:
                 continue
             
             category_id = None
-            if asset.get("category"):
-                category_id = category_map.get(asset.get("category"))
+            if names["category"]:
+                category_id = category_map.get(names["category"])
             elif asset.get("categoryId"):
                 category_id = asset.get("categoryId")
             
             subcategory_id = None
-            if asset.get("subCategory"):
-                subcategory_id = subcategory_map.get(asset.get("subCategory"))
+            if names["subCategory"]:
+                subcategory_id = subcategory_map.get(names["subCategory"])
             elif asset.get("subCategoryId"):
                 subcategory_id = asset.get("subCategoryId")
             
@@ -1383,196 +1377,118 @@ async def import_assets(
             assets_to_create.append(asset_data)
         
         # Prepare all related data before transaction
-        # Map asset tag IDs to their data for quick lookup
-        asset_data_map = {a["assetTagId"]: a for a in assets_to_create}
-        
         # Pre-process audit and checkout data
-        assets_with_audit = [
-            asset for asset in assets
+        audit_data_map = {
+            asset.get("assetTagId"): asset for asset in assets
             if asset.get("assetTagId") and asset.get("assetTagId") not in existing_asset_tags
             and (asset.get("lastAuditDate") or asset.get("lastAuditType") or asset.get("lastAuditor"))
-        ]
-        audit_data_map = {a.get("assetTagId"): a for a in assets_with_audit}
+        }
         
-        checkout_statuses = ["checked out", "checked-out", "checkedout", "in use"]
-        checkout_asset_tag_ids = {
-            a["assetTagId"] for a in assets_to_create
-            if a.get("status") and a.get("status", "").lower().strip() in checkout_statuses
+        # Checkout date per checked-out asset, so the full rows don't need a second index
+        checkout_dates = {
+            a["assetTagId"]: a["deliveryDate"] or a["purchaseDate"]
+            for a in assets_to_create
+            if (a["status"] or "").lower().strip() in IMPORT_CHECKOUT_STATUSES
         }
         
+        async def create_import_records(db) -> Tuple[int, Dict[str, str]]:
+            """
+            Insert the assets and their history/audit/checkout records through db
+            (the Prisma client or a transaction). Returns (created count, assetTagId -> id).
+            """
+            async def create_many_in_batches(model, data: List[Dict[str, Any]]) -> int:
+                # Sequential on purpose: a transaction runs on a single connection anyway
+                total = 0
+                for start in range(0, len(data), IMPORT_CREATE_BATCH_SIZE):
+                    total += await model.create_many(
+                        data=data[start:start + IMPORT_CREATE_BATCH_SIZE],
+                        skip_duplicates=True
+                    )
+                return total
+            
+            # One timestamp for every defaulted audit/checkout date in this import
+            now = datetime.now()
+            
+            # 1. Batch create assets
+            count = await create_many_in_batches(db.assets, assets_to_create)
+            
+            # 2. Fetch created assets once (needed for IDs)
+            created_asset_tag_ids = [a["assetTagId"] for a in assets_to_create]
+            created_assets = await db.assets.find_many(
+                where={"assetTagId": {"in": created_asset_tag_ids}}
+            )
+            
+            # Build lookup maps
+            id_map = {a.assetTagId: str(a.id) for a in created_assets}
+            asset_created_at_map = {a.assetTagId: a.createdAt for a in created_assets}
+            
+            # 3. Batch create history logs (all at once)
+            history_logs_to_create = [
+                {
+                    "assetId": id_map[tag_id],
+                    "eventType": "added",
+                    "actionBy": user_name,
+                    "eventDate": asset_created_at_map[tag_id],
+                }
+                for tag_id in id_map.keys()
+            ]
+            if history_logs_to_create:
+                await create_many_in_batches(db.assetshistorylogs, history_logs_to_create)
+            
+            # 4. Batch create audit records (all at once); rows without a date or type are skipped
+            audit_dates = {
+                tag_id: last_audit if isinstance(last_audit, datetime) else parse_date(last_audit) or now
+                for tag_id, asset in audit_data_map.items()
+                if (last_audit := asset.get("lastAuditDate"))
+            }
+            audit_records_to_create = [
+                {
+                    "assetId": id_map[tag_id],
+                    "auditType": asset.get("lastAuditType") or "Imported Audit",
+                    "auditDate": audit_dates.get(tag_id, now),
+                    "auditor": asset.get("lastAuditor"),
+                    "status": "Completed",
+                    "notes": "Imported from Excel file",
+                }
+                for tag_id, asset in audit_data_map.items()
+                if tag_id in id_map and (tag_id in audit_dates or asset.get("lastAuditType"))
+            ]
+            
+            if audit_records_to_create:
+                await create_many_in_batches(db.assetsaudithistory, audit_records_to_create)
+            
+            # 5. Batch create checkout records (all at once)
+            checkout_records_to_create = [
+                {
+                    "assetId": id_map[tag_id],
+                    "employeeUserId": None,
+                    "checkoutDate": checkout_date or now,
+                    "expectedReturnDate": None,
+                }
+                for tag_id, checkout_date in checkout_dates.items()
+                if tag_id in id_map
+            ]
+            
+            if checkout_records_to_create:
+                await create_many_in_batches(db.assetscheckout, checkout_records_to_create)
+            
+            return count, id_map
+        
         # Batch insert assets and all related records in a single transaction
         created_count = 0
+        # assetTagId -> id of the assets created here, reused for URL processing below
+        asset_id_map: Dict[str, str] = {}
         if assets_to_create:
             try:
                 # Use transaction to batch everything together
                 async with prisma.tx() as transaction:
-                    # 1. Batch create assets
-                    created_count = await transaction.assets.create_many(
-                        data=assets_to_create,
-                        skip_duplicates=True
-                    )
-                    
-                    # 2. Fetch created assets once (needed for IDs)
-                    created_asset_tag_ids = [a["assetTagId"] for a in assets_to_create]
-                    created_assets = await transaction.assets.find_many(
-                        where={"assetTagId": {"in": created_asset_tag_ids}}
-                    )
-                    
-                    # Build lookup maps
-                    asset_id_map = {a.assetTagId: str(a.id) for a in created_assets}
-                    asset_created_at_map = {a.assetTagId: a.createdAt for a in created_assets}
-                    
-                    # 3. Batch create history logs (all at once)
-                    history_logs_to_create = [
-                        {
-                            "assetId": asset_id_map[tag_id],
-                            "eventType": "added",
-                            "actionBy": user_name,
-                            "eventDate": asset_created_at_map[tag_id],
-                        }
-                        for tag_id in asset_id_map.keys()
-                    ]
-                    if history_logs_to_create:
-                        await transaction.assetshistorylogs.create_many(
-                            data=history_logs_to_create,
-                            skip_duplicates=True
-                        )
-                    
-                    # 4. Batch create audit records (all at once)
-                    audit_records_to_create = []
-                    for tag_id, asset in audit_data_map.items():
-                        asset_id = asset_id_map.get(tag_id)
-                        if not asset_id:
-                            continue
-                        
-                        audit_date = None
-                        if asset.get("lastAuditDate"):
-                            if isinstance(asset.get("lastAuditDate"), datetime):
-                                audit_date = asset.get("lastAuditDate")
-                            else:
-                                audit_date = parse_date(asset.get("lastAuditDate")) or datetime.now()
-                        else:
-                            audit_date = datetime.now()
-                        
-                        if not asset.get("lastAuditDate") and not asset.get("lastAuditType"):
-                            continue
-                        
-                        audit_records_to_create.append({
-                            "assetId": asset_id,
-                            "auditType": asset.get("lastAuditType") or "Imported Audit",
-                            "auditDate": audit_date,
-                            "auditor": asset.get("lastAuditor"),
-                            "status": "Completed",
-                            "notes": "Imported from Excel file",
-                        })
-                    
-                    if audit_records_to_create:
-                        await transaction.assetsaudithistory.create_many(
-                            data=audit_records_to_create,
-                            skip_duplicates=True
-                        )
-                    
-                    # 5. Batch create checkout records (all at once)
-                    checkout_records_to_create = []
-                    for tag_id in checkout_asset_tag_ids:
-                        asset_id = asset_id_map.get(tag_id)
-                        if not asset_id:
-                            continue
-                        
-                        asset_data = asset_data_map.get(tag_id, {})
-                        checkout_date = asset_data.get("deliveryDate") or asset_data.get("purchaseDate") or datetime.now()
-                        if not isinstance(checkout_date, datetime):
-                            checkout_date = parse_date(checkout_date) or datetime.now()
-                        
-                        checkout_records_to_create.append({
-                            "assetId": asset_id,
-                            "employeeUserId": None,
-                            "checkoutDate": checkout_date,
-                            "expectedReturnDate": None,
-                        })
-                    
-                    if checkout_records_to_create:
-                        await transaction.assetscheckout.create_many(
-                            data=checkout_records_to_create,
-                            skip_duplicates=True
-                        )
-                    
+                    created_count, asset_id_map = await create_import_records(transaction)
             except Exception as e:
                 logger.error(f"Error in transaction batch create: {e}", exc_info=True)
-                # Fallback: try without transaction (slower but works)
+                # Fallback: try without transaction (slower but works).
+                # The transaction rolled back, so the assets are fetched again there.
                 try:
-                    created_count = await prisma.assets.create_many(
-                        data=assets_to_create,
-                        skip_duplicates=True
-                    )
-                    
-                    # Fetch created assets once
-                    created_asset_tag_ids = [a["assetTagId"] for a in assets_to_create]
-                    created_assets = await prisma.assets.find_many(
-                        where={"assetTagId": {"in": created_asset_tag_ids}}
-                    )
-                    asset_id_map = {a.assetTagId: str(a.id) for a in created_assets}
-                    asset_created_at_map = {a.assetTagId: a.createdAt for a in created_assets}
-                    
-                    # Create history logs
-                    history_logs_to_create = [
-                        {
-                            "assetId": asset_id_map[tag_id],
-                            "eventType": "added",
-                            "actionBy": user_name,
-                            "eventDate": asset_created_at_map[tag_id],
-                        }
-                        for tag_id in asset_id_map.keys()
-                    ]
-                    if history_logs_to_create:
-                        await prisma.assetshistorylogs.create_many(
-                            data=history_logs_to_create,
-                            skip_duplicates=True
-                        )
-                    
-                    # Create audit records
-                    audit_records_to_create = []
-                    for tag_id, asset in audit_data_map.items():
-                        asset_id = asset_id_map.get(tag_id)
-                        if not asset_id:
-                            continue
-                        audit_date = parse_date(asset.get("lastAuditDate")) if asset.get("lastAuditDate") else datetime.now()
-                        if asset.get("lastAuditDate") or asset.get("lastAuditType"):
-                            audit_records_to_create.append({
-                                "assetId": asset_id,
-                                "auditType": asset.get("lastAuditType") or "Imported Audit",
-                                "auditDate": audit_date,
-                                "auditor": asset.get("lastAuditor"),
-                                "status": "Completed",
-                                "notes": "Imported from Excel file",
-                            })
-                    if audit_records_to_create:
-                        await prisma.assetsaudithistory.create_many(
-                            data=audit_records_to_create,
-                            skip_duplicates=True
-                        )
-                    
-                    # Create checkout records
-                    checkout_records_to_create = []
-                    for tag_id in checkout_asset_tag_ids:
-                        asset_id = asset_id_map.get(tag_id)
-                        if not asset_id:
-                            continue
-                        asset_data = asset_data_map.get(tag_id, {})
-                        checkout_date = asset_data.get("deliveryDate") or asset_data.get("purchaseDate") or datetime.now()
-                        if not isinstance(checkout_date, datetime):
-                            checkout_date = parse_date(checkout_date) or datetime.now()
-                        checkout_records_to_create.append({
-                            "assetId": asset_id,
-                            "employeeUserId": None,
-                            "checkoutDate": checkout_date,
-                            "expectedReturnDate": None,
-                        })
-                    if checkout_records_to_create:
-                        await prisma.assetscheckout.create_many(
-                            data=checkout_records_to_create,
-                            skip_duplicates=True
-                        )
+                    created_count, asset_id_map = await create_import_records(prisma)
                 except Exception as fallback_error:
                     logger.error(f"Error in fallback batch create: {fallback_error}", exc_info=True)
                     raise HTTPException(
@@ -1584,236 +1500,223 @@ async def import_assets(
         # Download and upload to Supabase storage, then create records
         if created_count > 0:
             try:
-                # Get created assets for URL processing
-                created_asset_tag_ids = [a["assetTagId"] for a in assets_to_create]
-                created_assets_for_urls = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": created_asset_tag_ids}}
-                )
-                asset_tag_to_id_map = {a.assetTagId: str(a.id) for a in created_assets_for_urls}
-                
                 # Process images and documents
                 supabase_admin = get_supabase_admin_client()
-                images_to_create = []
-                documents_to_create = []
+                # Uploads run concurrently, so the timestamp is taken once and each file
+                # gets its job index appended to keep names unique (uploads don't upsert)
+                batch_timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
                 
-                async def download_and_upload_file(url: str, asset_tag_id: str, file_type: str) -> Optional[str]:
+                async def download_and_upload_file(client: httpx.AsyncClient, url: str, asset_tag_id: str, file_type: str, seq: int) -> Optional[str]:
                     """Download file from URL and upload to Supabase storage"""
                     try:
-                        # Validate URL
-                        if not url or not isinstance(url, str) or not url.startswith('http'):
-                            return None
+                        # Skip files that already exist in our Supabase storage
+                        location = _supabase_storage_location(url)
+                        if location and location[2] in existing_storage_files.get(location[:2], ()):
+                            return url
                         
-                        # Check if URL is already in our Supabase storage
-                        if 'supabase.co/storage/v1/object/public' in url:
-                            # Extract path from existing Supabase URL
-                            url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', url)
-                            if url_match:
-                                bucket = url_match.group(1)
-                                existing_path = url_match.group(2)
-                                
-                                # Check if file exists in storage
-                                try:
-                                    folder_path = existing_path.rsplit('/', 1)[0] if '/' in existing_path else ''
-                                    file_info = supabase_admin.storage.from_(bucket).list(
-                                        folder_path,
-                                        {"limit": 1000}
-                                    )
-                                    file_name = existing_path.split('/')[-1]
-                                    if file_info:
-                                        for f in file_info:
-                                            if f.get('name') == file_name:
-                                                # File exists, return the URL
-                                                return url
-                                except Exception:
-                                    pass
-                        
-                        # Download file
-                        async with httpx.AsyncClient(timeout=30.0) as client:
-                            response = await client.get(url)
+                        # Download file, stopping as soon as it exceeds the size limit (max 5MB)
+                        max_size = 5 * 1024 * 1024
+                        async with client.stream("GET", url) as response:
                             if response.status_code != 200:
                                 logger.warning(f"Failed to download file from {url}: Status {response.status_code}")
                                 return None
                             
-                            file_content = response.content
-                            file_size = len(file_content)
-                            
-                            # Validate file size (max 5MB)
-                            max_size = 5 * 1024 * 1024
-                            if file_size > max_size:
-                                logger.warning(f"File from {url} is too large: {file_size} bytes")
+                            declared_size = response.headers.get('content-length')
+                            if declared_size and declared_size.isdigit() and int(declared_size) > max_size:
+                                logger.warning(f"File from {url} is too large: {declared_size} bytes")
                                 return None
                             
-                            # Determine content type
-                            content_type = response.headers.get('content-type', 'application/octet-stream')
-                            
-                            # Extract file extension from URL
-                            parsed_url = urlparse(url)
-                            file_name_from_url = os.path.basename(parsed_url.path)
-                            file_extension = os.path.splitext(file_name_from_url)[1] or ('.jpg' if 'image' in content_type else '.pdf')
-                            sanitized_extension = file_extension.lower().lstrip('.')
-                            
-                            # Generate unique file path
-                            timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
-                            
-                            if file_type == 'image':
-                                folder = 'assets_images'
-                                file_name = f"{asset_tag_id}-{timestamp}.{sanitized_extension}"
-                            else:  # document
-                                folder = 'assets_documents'
-                                file_name = f"{asset_tag_id}-{timestamp}.{sanitized_extension}"
-                            
-                            file_path = f"{folder}/{file_name}"
-                            
-                            # Upload to Supabase storage
-                            try:
-                                upload_response = supabase_admin.storage.from_('assets').upload(
+                            buffer = bytearray()
+                            async for chunk in response.aiter_bytes():
+                                buffer += chunk
+                                if len(buffer) > max_size:
+                                    logger.warning(f"File from {url} is too large: over {max_size} bytes")
+                                    return None
+                        file_content = bytes(buffer)
+                        
+                        # Determine content type
+                        content_type = response.headers.get('content-type', 'application/octet-stream')
+                        
+                        # Extract file extension from URL
+                        parsed_url = urlparse(url)
+                        file_name_from_url = os.path.basename(parsed_url.path)
+                        file_extension = os.path.splitext(file_name_from_url)[1] or ('.jpg' if 'image' in content_type else '.pdf')
+                        sanitized_extension = file_extension.lower().lstrip('.')
+                        
+                        # Generate unique file path
+                        folder = 'assets_images' if file_type == 'image' else 'assets_documents'
+                        file_name = f"{asset_tag_id}-{batch_timestamp}-{seq}.{sanitized_extension}"
+                        
+                        file_path = f"{folder}/{file_name}"
+                        
+                        # Upload to Supabase storage
+                        try:
+                            # The storage client is synchronous; keep it off the event loop
+                            # so concurrent downloads keep making progress
+                            upload_response = await asyncio.get_running_loop().run_in_executor(
+                                _STORAGE_EXECUTOR,
+                                functools.partial(
+                                    supabase_admin.storage.from_('assets').upload,
                                     file_path,
                                     file_content,
                                     file_options={"content-type": content_type, "upsert": "false"}
                                 )
-                                
-                                if upload_response and (not isinstance(upload_response, dict) or not upload_response.get('error')):
-                                    url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
-                                    public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
-                                    return public_url
-                                else:
-                                    logger.warning(f"Failed to upload file to storage: {upload_response}")
-                                    return None
-                            except Exception as upload_error:
-                                logger.warning(f"Error uploading file to storage: {upload_error}")
+                            )
+                            
+                            if upload_response and (not isinstance(upload_response, dict) or not upload_response.get('error')):
+                                url_data = supabase_admin.storage.from_('assets').get_public_url(file_path)
+                                public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
+                                return public_url
+                            else:
+                                logger.warning(f"Failed to upload file to storage: {upload_response}")
                                 return None
+                        except Exception as upload_error:
+                            logger.warning(f"Error uploading file to storage: {upload_error}")
+                            return None
                     
                     except Exception as e:
                         logger.warning(f"Error downloading/uploading file from {url}: {e}")
                         return None
                 
-                # Process images and documents from import data
+                # Collect every URL from the import data first: (asset, asset_tag_id, file_type, url)
+                upload_jobs = []
+                # Column names repeat across rows, so match the document column
+                # variants once per distinct key instead of once per row
+                document_keys = {
+                    key for key in set().union(*assets)
+                    if isinstance(key, str) and key.lower() in IMPORT_DOCUMENT_FIELDS
+                }
                 for asset in assets:
                     asset_tag_id = asset.get("assetTagId")
-                    if not asset_tag_id or asset_tag_id not in asset_tag_to_id_map:
+                    if not asset_tag_id or asset_tag_id not in asset_id_map:
                         continue
                     
                     # Check for image URLs (try multiple field names, handle comma/semicolon separated)
-                    images_field = asset.get("images") or asset.get("imageUrl") or asset.get("image") or asset.get("imageURL") or asset.get("image_url")
-                    if images_field:
-                        # Handle multiple URLs separated by comma or semicolon
-                        image_urls = []
-                        if isinstance(images_field, str):
-                            # Split by comma or semicolon
-                            image_urls = [url.strip() for url in re.split(r'[,;]', images_field) if url.strip()]
-                        elif isinstance(images_field, list):
-                            image_urls = [str(url).strip() for url in images_field if url]
-                        
-                        for image_url in image_urls:
-                            if not image_url or not image_url.startswith('http'):
-                                continue
-                            
-                            uploaded_url = await download_and_upload_file(image_url, asset_tag_id, 'image')
-                            if uploaded_url:
-                                # Determine image type
-                                url_extension = uploaded_url.split('.')[-1].split('?')[0].lower() if '.' in uploaded_url else None
-                                image_type = f"image/{url_extension}" if url_extension else "image/jpeg"
-                                if image_type == "image/jpg":
-                                    image_type = "image/jpeg"
-                                
-                                images_to_create.append({
-                                    "assetTagId": asset_tag_id,
-                                    "imageUrl": uploaded_url,
-                                    "imageType": image_type,
-                                    "imageSize": None,  # Could fetch from storage if needed
-                                })
-                            else:
-                                logger.warning(f"Failed to upload image for {asset_tag_id} from {image_url[:100]}...")
+                    images_field = next((value for key in IMPORT_IMAGE_FIELDS if (value := asset.get(key))), None)
+                    upload_jobs.extend(
+                        (asset, asset_tag_id, 'image', image_url)
+                        for image_url in _split_import_urls(images_field)
+                        if _is_http_url(image_url)
+                    )
                     
                     # Check for document URLs (try multiple field names, handle comma/semicolon separated)
                     # Try various field name variations (case-insensitive check)
-                    documents_field = None
-                    for key in asset.keys():
-                        key_lower = key.lower()
-                        if key_lower in ['documents', 'documenturl', 'document', 'document_url']:
-                            value = asset.get(key)
-                            if value and (isinstance(value, str) and value.strip()) or isinstance(value, list) and value:
-                                documents_field = value
-                                break
-                    
-                    # Handle multiple document URLs separated by comma or semicolon
-                    document_urls = []
-                    if documents_field:
-                        if isinstance(documents_field, str):
-                            # Split by comma or semicolon
-                            document_urls = [url.strip() for url in re.split(r'[,;]', documents_field) if url.strip()]
-                        elif isinstance(documents_field, list):
-                            document_urls = [str(url).strip() for url in documents_field if url]
+                    documents_field = next(
+                        (
+                            value for key, value in asset.items()
+                            if key in document_keys
+                            and (isinstance(value, str) and value.strip() or isinstance(value, list) and value)
+                        ),
+                        None,
+                    ) if document_keys else None
                     
-                    for document_url in document_urls:
-                        if not document_url or not document_url.startswith('http'):
-                            continue
-                        
-                        uploaded_url = await download_and_upload_file(document_url, asset_tag_id, 'document')
-                        if uploaded_url:
-                            # Determine document type
-                            url_extension = uploaded_url.split('.')[-1].split('?')[0].lower() if '.' in uploaded_url else None
-                            mime_type_map = {
-                                'pdf': 'application/pdf',
-                                'doc': 'application/msword',
-                                'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                                'xls': 'application/vnd.ms-excel',
-                                'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                                'txt': 'text/plain',
-                                'csv': 'text/csv',
-                                'rtf': 'application/rtf',
-                            }
-                            mime_type = mime_type_map.get(url_extension, 'application/octet-stream')
-                            
-                            documents_to_create.append({
-                                "assetTagId": asset_tag_id,
-                                "documentUrl": uploaded_url,
-                                "documentType": asset.get("documentType"),
-                                "fileName": os.path.basename(urlparse(uploaded_url).path),
-                                "mimeType": mime_type,
-                            })
-                        else:
-                            logger.warning(f"Failed to upload document for {asset_tag_id} from {document_url[:100]}...")
+                    upload_jobs.extend(
+                        (asset, asset_tag_id, 'document', document_url)
+                        for document_url in _split_import_urls(documents_field)
+                        if _is_http_url(document_url)
+                    )
+                
+                # List each Supabase folder referenced by the URLs once, instead of per URL
+                storage_folders = {
+                    location[:2]
+                    for _, _, _, url in upload_jobs
+                    if (location := _supabase_storage_location(url))
+                }
                 
-                # Batch create image and document records
-                if images_to_create:
+                async def list_storage_folder(bucket: str, folder_path: str) -> Set[str]:
                     try:
-                        result = await prisma.assetsimage.create_many(
-                            data=images_to_create,
-                            skip_duplicates=True
+                        file_info = await asyncio.get_running_loop().run_in_executor(
+                            _STORAGE_EXECUTOR,
+                            supabase_admin.storage.from_(bucket).list,
+                            folder_path,
+                            {"limit": 1000}
                         )
-                        logger.info(f"Created {result} image records")
-                    except Exception as e:
-                        logger.error(f"Error creating image records: {e}", exc_info=True)
+                        return {f.get('name') for f in file_info or ()}
+                    except Exception:
+                        return set()
+                
+                folder_listings = await asyncio.gather(*(
+                    list_storage_folder(bucket, folder_path) for bucket, folder_path in storage_folders
+                ))
+                existing_storage_files: Dict[Tuple[str, str], Set[str]] = dict(zip(storage_folders, folder_listings))
                 
-                if documents_to_create:
+                # Download/upload concurrently, bounded so a large import doesn't open
+                # hundreds of connections at once
+                upload_semaphore = asyncio.Semaphore(IMPORT_UPLOAD_CONCURRENCY)
+                
+                async def bounded_download_and_upload(client: httpx.AsyncClient, url: str, asset_tag_id: str, file_type: str, seq: int) -> Optional[str]:
+                    async with upload_semaphore:
+                        return await download_and_upload_file(client, url, asset_tag_id, file_type, seq)
+                
+                # One client for the whole import so same-host URLs reuse connections
+                async with httpx.AsyncClient(
+                    timeout=30.0,
+                    limits=httpx.Limits(max_keepalive_connections=IMPORT_UPLOAD_CONCURRENCY, max_connections=IMPORT_UPLOAD_CONCURRENCY * 2),
+                ) as http_client:
+                    uploaded_urls = await asyncio.gather(*(
+                        bounded_download_and_upload(http_client, url, asset_tag_id, file_type, seq)
+                        for seq, (_, asset_tag_id, file_type, url) in enumerate(upload_jobs)
+                    ))
+                
+                uploaded_files = list(zip(upload_jobs, uploaded_urls))
+                for (_, asset_tag_id, file_type, source_url), uploaded_url in uploaded_files:
+                    if not uploaded_url:
+                        logger.warning(f"Failed to upload {file_type} for {asset_tag_id} from {source_url[:100]}...")
+                
+                images_to_create = [
+                    {
+                        "assetTagId": asset_tag_id,
+                        "imageUrl": uploaded_url,
+                        "imageType": _import_image_type(uploaded_url),
+                        "imageSize": None,  # Could fetch from storage if needed
+                    }
+                    for (_, asset_tag_id, file_type, _), uploaded_url in uploaded_files
+                    if uploaded_url and file_type == 'image'
+                ]
+                documents_to_create = [
+                    {
+                        "assetTagId": asset_tag_id,
+                        "documentUrl": uploaded_url,
+                        "documentType": asset.get("documentType"),
+                        "fileName": os.path.basename(urlparse(uploaded_url).path),
+                        "mimeType": IMPORT_DOCUMENT_MIME_TYPES.get(_url_extension(uploaded_url), 'application/octet-stream'),
+                    }
+                    for (asset, asset_tag_id, file_type, _), uploaded_url in uploaded_files
+                    if uploaded_url and file_type == 'document'
+                ]
+                
+                # Batch create image and document records; independent tables, so in parallel
+                async def create_file_records(model, records: List[Dict[str, Any]], label: str) -> None:
+                    if not records:
+                        return
                     try:
-                        result = await prisma.assetsdocument.create_many(
-                            data=documents_to_create,
+                        result = await model.create_many(
+                            data=records,
                             skip_duplicates=True
                         )
-                        logger.info(f"Created {result} document records")
+                        logger.info(f"Created {result} {label} records")
                     except Exception as e:
-                        logger.error(f"Error creating document records: {e}", exc_info=True)
+                        logger.error(f"Error creating {label} records: {e}", exc_info=True)
+                
+                await asyncio.gather(
+                    create_file_records(prisma.assetsimage, images_to_create, "image"),
+                    create_file_records(prisma.assetsdocument, documents_to_create, "document"),
+                )
             
             except Exception as url_error:
                 # Don't fail the import if URL processing fails
                 logger.warning(f"Error processing image/document URLs during import: {url_error}")
         
-        # Prepare results
-        results = []
-        for asset in assets:
-            asset_tag_id = asset.get("assetTagId")
-            if not asset_tag_id:
-                continue
-            
-            if asset_tag_id in existing_asset_tags:
-                if asset_tag_id in deleted_asset_tags:
-                    results.append({"asset": asset_tag_id, "action": "skipped", "reason": "Asset exists in trash"})
-                else:
-                    results.append({"asset": asset_tag_id, "action": "skipped", "reason": "Duplicate asset tag"})
-            else:
-                results.append({"asset": asset_tag_id, "action": "created"})
+        # Prepare results: one lookup per row for the skip reason, created otherwise
+        skip_reasons = dict.fromkeys(existing_asset_tags, "Duplicate asset tag")
+        skip_reasons.update(dict.fromkeys(deleted_asset_tags, "Asset exists in trash"))
+        results = [
+            {"asset": asset_tag_id, "action": "skipped", "reason": reason}
+            if (reason := skip_reasons.get(asset_tag_id))
+            else {"asset": asset_tag_id, "action": "created"}
+            for asset_tag_id in (asset.get("assetTagId") for asset in assets)
+            if asset_tag_id
+        ]
         
         return {
             "message": "Assets imported successfully",
@@ -1845,8 +1748,12 @@ async def import_assets(
 
 
 # Helper functions for documents
+@functools.lru_cache(maxsize=1)
 def get_supabase_admin_client() -> Client:
-    """Get Supabase admin client for storage operations"""
+    """
+    Get Supabase admin client for storage operations.
+    Created once and shared; a missing key raises and is not cached.
+    """
     supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     if not supabase_service_key:
         raise HTTPException(
@@ -1856,6 +1763,116 @@ def get_supabase_admin_client() -> Client:
     return create_client(SUPABASE_URL, supabase_service_key)
 
 
+# Stand-in object path used to read a bucket's public URL layout from the SDK
+_PUBLIC_URL_PATH_MARKER = "__public_url_path__"
+
+@functools.lru_cache(maxsize=16)
+def _public_url_affixes(bucket: str) -> Tuple[str, str]:
+    """Text before and after the object path in a bucket's public URLs"""
+    url_data = get_supabase_admin_client().storage.from_(bucket).get_public_url(_PUBLIC_URL_PATH_MARKER)
+    url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
+    prefix, _, suffix = url.partition(_PUBLIC_URL_PATH_MARKER)
+    return prefix, suffix
+
+
+def get_public_storage_url(bucket: str, path: str) -> str:
+    """
+    Public URL of a storage object, identical to the SDK's get_public_url.
+    The SDK only formats a string, so its layout (including the trailing '?' that
+    stored URLs carry) is captured once per bucket and filled in per file.
+    """
+    prefix, suffix = _public_url_affixes(bucket)
+    return f"{prefix}{path}{suffix}"
+
+
+async def read_upload_file(file: UploadFile, max_size: int, chunk_size: int = 64 * 1024) -> bytes:
+    """
+    Read an uploaded file in chunks, rejecting it with a 400 as soon as it
+    exceeds max_size instead of buffering the whole body first
+    """
+    too_large = HTTPException(
+        status_code=400,
+        detail=f"File size too large. Maximum size is {max_size // (1024 * 1024)}MB."
+    )
+    if file.size is not None and file.size > max_size:
+        raise too_large
+    
+    buffer = bytearray()
+    while chunk := await file.read(chunk_size):
+        buffer += chunk
+        if len(buffer) > max_size:
+            raise too_large
+    return bytes(buffer)
+
+
+# Bytes used in the assets bucket and file-history/assets, for the upload storage
+# limits. Counted with a full listing, then kept current by uploads through this
+# worker; the count is redone after the TTL or a delete, which also corrects for
+# changes made elsewhere (other workers, uploads that skip the limit check).
+_STORAGE_USAGE_TTL = 300.0
+_storage_usage: Dict[str, float] = {"bytes": 0, "expires_at": 0.0}
+_storage_usage_lock = asyncio.Lock()
+
+
+async def _count_storage_used(supabase_admin: Client) -> int:
+    """Sum object sizes from a full listing of both storage locations"""
+    async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
+        all_files: List[Dict[str, Any]] = []
+        try:
+            response = await asyncio.to_thread(
+                supabase_admin.storage.from_(bucket).list, folder, {"limit": 1000}
+            )
+            if not response:
+                return all_files
+            subfolders: List[str] = []
+            for item in response:
+                item_path = f"{folder}/{item['name']}" if folder else item['name']
+                is_folder = item.get('id') is None
+                if is_folder:
+                    # Listed below, concurrently with the sibling folders
+                    subfolders.append(item_path)
+                else:
+                    all_files.append({
+                        "metadata": item.get('metadata', {}),
+                        "path": item_path
+                    })
+            
+            for sub_files in await asyncio.gather(*(list_all_files(bucket, path) for path in subfolders)):
+                all_files.extend(sub_files)
+        except Exception as e:
+            logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
+        return all_files
+    
+    assets_files, file_history_files = await asyncio.gather(
+        list_all_files('assets', ''),
+        list_all_files('file-history', 'assets'),
+    )
+    return sum(
+        f['metadata']['size']
+        for f in assets_files + file_history_files
+        if isinstance(f.get('metadata'), dict) and f['metadata'].get('size')
+    )
+
+
+async def get_storage_used(supabase_admin: Client) -> int:
+    """Storage bytes used, listing the buckets only when the cached count is stale"""
+    async with _storage_usage_lock:
+        if time.monotonic() >= _storage_usage["expires_at"]:
+            _storage_usage["bytes"] = await _count_storage_used(supabase_admin)
+            _storage_usage["expires_at"] = time.monotonic() + _STORAGE_USAGE_TTL
+        return int(_storage_usage["bytes"])
+
+
+def adjust_storage_used(delta: int) -> None:
+    """Account for bytes added (or removed) since the last count"""
+    _storage_usage["bytes"] = max(0, _storage_usage["bytes"] + delta)
+
+
+def invalidate_storage_used() -> None:
+    """Force a fresh count on the next upload; call after deleting storage objects"""
+    _storage_usage["expires_at"] = 0.0
+
+
 async def check_permission(user_id: str, permission: str) -> bool:
     """Check if user has a specific permission"""
     try:
@@ -1897,13 +1914,14 @@ async def get_documents(
             all_files: List[Dict[str, Any]] = []
             
             try:
-                response = supabase_admin.storage.from_(bucket).list(folder, {
-                    "limit": 1000
-                })
+                response = await asyncio.to_thread(
+                    supabase_admin.storage.from_(bucket).list, folder, {"limit": 1000}
+                )
                 
                 if not response:
                     return all_files
                 
+                subfolders: List[str] = []
                 for item in response:
                     item_path = f"{folder}/{item['name']}" if folder else item['name']
                     
@@ -1911,9 +1929,8 @@ async def get_documents(
                     is_folder = item.get('id') is None
                     
                     if is_folder:
-                        # It's a folder, recursively list files inside
-                        sub_files = await list_all_files(bucket, item_path)
-                        all_files.extend(sub_files)
+                        # Listed below, concurrently with the sibling folders
+                        subfolders.append(item_path)
                     else:
                         # Include all files
                         all_files.append({
@@ -1923,36 +1940,44 @@ async def get_documents(
                             "path": item_path,
                             "metadata": item.get('metadata', {})
                         })
+                
+                for sub_files in await asyncio.gather(*(list_all_files(bucket, path) for path in subfolders)):
+                    all_files.extend(sub_files)
             except Exception as e:
                 logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
             
             return all_files
         
         # Fetch fresh file list
-        # List files from assets_documents folder in assets bucket
-        assets_files = await list_all_files('assets', 'assets_documents')
-        
-        # List files from assets_documents folder in file-history bucket
-        file_history_files = await list_all_files('file-history', 'assets/assets_documents')
+        # List files from assets_documents folder in the assets and file-history buckets, concurrently
+        assets_files, file_history_files = await asyncio.gather(
+            list_all_files('assets', 'assets_documents'),
+            list_all_files('file-history', 'assets/assets_documents'),
+        )
         
-        # Combine files from both buckets
+        # Combine files from both buckets (only from their assets_documents folders).
+        # Storage totals cover ALL files, not just the page, so they are added up here:
+        # sizes from storage metadata, or the public URL to look the size up in the database
         combined_files: List[Dict[str, Any]] = []
-        
-        # Add files from assets bucket (only from assets_documents folder)
-        for file in assets_files:
-            if file['path'].startswith('assets_documents/') and not file['path'].startswith('assets_images/'):
-                combined_files.append({
-                    **file,
-                    "bucket": 'assets',
-                })
-        
-        # Add files from file-history bucket (only from assets/assets_documents folder)
-        for file in file_history_files:
-            if file['path'].startswith('assets/assets_documents/') and not file['path'].startswith('assets/assets_images/'):
+        sized_storage_used = 0
+        unsized_file_urls: Set[str] = set()
+        for bucket, bucket_files, documents_prefix in (
+            ('assets', assets_files, 'assets_documents/'),
+            ('file-history', file_history_files, 'assets/assets_documents/'),
+        ):
+            for file in bucket_files:
+                if not file['path'].startswith(documents_prefix):
+                    continue
                 combined_files.append({
                     **file,
-                    "bucket": 'file-history',
+                    "bucket": bucket,
                 })
+                metadata = file.get('metadata')
+                storage_size = metadata.get('size') if isinstance(metadata, dict) else None
+                if storage_size:
+                    sized_storage_used += storage_size
+                else:
+                    unsized_file_urls.add(get_public_storage_url(bucket, file['path']))
         
         # Sort by created_at descending
         combined_files.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -1966,8 +1991,7 @@ async def get_documents(
         file_data = []
         for file in paginated_files:
             try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data if isinstance(url_data, str) else url_data.get('publicUrl', '') if isinstance(url_data, dict) else ''
+                public_url = get_public_storage_url(file['bucket'], file['path'])
                 
                 # Extract full filename and assetTagId
                 path_parts = file['path'].split('/')
@@ -1975,9 +1999,7 @@ async def get_documents(
                 
                 # Extract assetTagId - filename format is: assetTagId-timestamp.ext
                 file_name_without_ext = actual_file_name.rsplit('.', 1)[0] if '.' in actual_file_name else actual_file_name
-                import re
-                timestamp_match = re.search(r'-(20\d{2}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)$', file_name_without_ext)
-                asset_tag_id = file_name_without_ext[:timestamp_match.start()] if timestamp_match else file_name_without_ext.split('-')[0] if '-' in file_name_without_ext else file_name_without_ext
+                asset_tag_id = _asset_tag_from_file_name(file_name_without_ext)
                 
                 # If the extracted assetTagId is "documents", it's a standalone document upload
                 if asset_tag_id == 'documents':
@@ -1996,18 +2018,15 @@ async def get_documents(
                 continue
         
         # Batch query: Get all linked documents in a single query
-        all_public_urls = [fd['publicUrl'] for fd in file_data if fd['publicUrl']]
+        # Deduplicated up front so the IN lists carry each URL once
+        all_public_urls = list(dict.fromkeys(fd['publicUrl'] for fd in file_data if fd['publicUrl']))
+        public_url_set = set(all_public_urls)
         
-        # Normalize URLs by removing query parameters and fragments
-        def normalize_url(url: str) -> str:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            except:
-                return url.split('?')[0].split('#')[0]
-        
-        normalized_public_urls = [normalize_url(url) for url in all_public_urls]
+        # Only normalized forms that differ from a raw URL need their own IN arm
+        normalized_public_urls = list(dict.fromkeys(
+            normalized for normalized in map(_normalize_url, all_public_urls)
+            if normalized not in public_url_set
+        ))
         
         # Build OR conditions for URL matching
         url_conditions = []
@@ -2016,37 +2035,68 @@ async def get_documents(
         if normalized_public_urls:
             url_conditions.append({"documentUrl": {"in": normalized_public_urls}})
         
-        # Add filename-based matches
-        for fd in file_data:
-            if fd['actualFileName']:
-                url_conditions.append({"documentUrl": {"contains": fd['actualFileName']}})
+        # No per-filename "contains" terms: each is a LIKE '%...%' that no index can
+        # serve. Filename matches are made in Python on the fetched rows.
         
-        # Query linked documents
-        # Note: Prisma Python doesn't support 'select', so we fetch all fields
-        all_linked_documents = []
-        if url_conditions:
+        async def fetch_page_documents() -> list:
+            # Note: Prisma Python doesn't support 'select', so we fetch all fields
+            if not url_conditions:
+                return []
             try:
-                all_linked_documents_raw = await prisma.assetsdocument.find_many(
+                return await prisma.assetsdocument.find_many(
                     where={"OR": url_conditions}
                 )
-                # Extract only the fields we need
-                all_linked_documents = [
-                    {
-                        "assetTagId": doc.assetTagId,
-                        "documentUrl": doc.documentUrl,
-                        "documentType": doc.documentType,
-                        "documentSize": doc.documentSize,
-                        "fileName": doc.fileName,
-                        "mimeType": doc.mimeType,
-                    }
-                    for doc in all_linked_documents_raw
-                ]
             except Exception as e:
                 logger.warning(f"Error querying linked documents: {e}")
+                return []
+        
+        async def sum_unsized_document_sizes() -> int:
+            if not unsized_file_urls:
+                return 0
+            try:
+                # A file linked to several assets has one row per link, but its bytes
+                # are stored once, so take a single (latest known) size per URL
+                rows = await prisma.query_raw(
+                    """
+                    SELECT COALESCE(SUM(document_size), 0)::bigint AS total
+                    FROM (
+                        SELECT DISTINCT ON (document_url) document_size
+                        FROM "assets_documents"
+                        WHERE document_url = ANY($1::text[]) AND document_size IS NOT NULL
+                        ORDER BY document_url, created_at DESC
+                    ) AS sizes
+                    """,
+                    list(unsized_file_urls)
+                )
+                return int(rows[0]["total"]) if rows else 0
+            except Exception as e:
+                logger.warning(f"Error querying all documents for storage calculation: {e}")
+                return 0
+        
+        db_documents, unsized_storage_used = await asyncio.gather(
+            fetch_page_documents(),
+            sum_unsized_document_sizes(),
+        )
+        
+        # Documents matching the paginated files by URL
+        page_urls = set(all_public_urls).union(normalized_public_urls)
+        all_linked_documents = [
+            {
+                "assetTagId": doc.assetTagId,
+                "documentUrl": doc.documentUrl,
+                "documentType": doc.documentType,
+                "documentSize": doc.documentSize,
+                "fileName": doc.fileName,
+                "mimeType": doc.mimeType,
+            }
+            for doc in db_documents
+            if doc.documentUrl and doc.documentUrl in page_urls
+        ]
         
         # Create maps for quick lookup
-        document_url_to_asset_tag_ids: Dict[str, set] = {}
-        asset_tag_id_to_document_urls: Dict[str, set] = {}
+        # Read back with .get() only, so lookups never add empty entries
+        document_url_to_asset_tag_ids: Dict[str, Set[str]] = defaultdict(set)
+        asset_tag_id_to_document_urls: Dict[str, Set[str]] = defaultdict(set)
         document_url_to_metadata: Dict[str, Dict[str, Any]] = {}
         
         for doc in all_linked_documents:
@@ -2063,14 +2113,8 @@ async def get_documents(
                 "mimeType": doc.get('mimeType'),
             }
             
-            # Map by documentUrl
-            if doc_url not in document_url_to_asset_tag_ids:
-                document_url_to_asset_tag_ids[doc_url] = set()
+            # Map by documentUrl and by assetTagId
             document_url_to_asset_tag_ids[doc_url].add(doc['assetTagId'])
-            
-            # Map by assetTagId
-            if doc['assetTagId'] not in asset_tag_id_to_document_urls:
-                asset_tag_id_to_document_urls[doc['assetTagId']] = set()
             asset_tag_id_to_document_urls[doc['assetTagId']].add(doc_url)
         
         # Also check for filename matches
@@ -2086,8 +2130,6 @@ async def get_documents(
             ]
             
             for url in matching_urls:
-                if url not in document_url_to_asset_tag_ids:
-                    document_url_to_asset_tag_ids[url] = set()
                 document_url_to_asset_tag_ids[url].add(asset_tag_id)
         
         # Get all unique asset tag IDs that are linked
@@ -2097,90 +2139,41 @@ async def get_documents(
             all_linked_asset_tag_ids.update(tag_ids)
         
         # Batch query: Get all asset deletion status
-        linked_assets_info_map: Dict[str, bool] = {}
-        if all_linked_asset_tag_ids:
+        async def fetch_linked_assets_info() -> Dict[str, bool]:
+            if not all_linked_asset_tag_ids:
+                return {}
             try:
-                assets = await prisma.assets.find_many(
-                    where={"assetTagId": {"in": list(all_linked_asset_tag_ids)}},
-                    select={"assetTagId": True, "isDeleted": True}
+                # Only the two columns used; find_many has no 'select' in Prisma Python
+                assets = await prisma.query_raw(
+                    'SELECT asset_tag_id AS "assetTagId", is_deleted AS "isDeleted" FROM "assets" WHERE asset_tag_id = ANY($1::text[])',
+                    list(all_linked_asset_tag_ids)
                 )
-                for asset in assets:
-                    linked_assets_info_map[asset['assetTagId']] = asset.get('isDeleted', False)
+                return {asset["assetTagId"]: bool(asset["isDeleted"]) for asset in assets}
             except Exception as e:
                 logger.warning(f"Error querying assets: {e}")
+                return {}
         
-        # Calculate total storage used from ALL files (not just paginated)
-        documents_files = [f for f in combined_files if f['path'].startswith('assets_documents/') or f['path'].startswith('assets/assets_documents/')]
-        all_file_data = []
-        for file in documents_files:
-            try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data if isinstance(url_data, str) else url_data.get('publicUrl', '') if isinstance(url_data, dict) else ''
-                all_file_data.append({
-                    "publicUrl": public_url,
-                    "storageSize": file.get('metadata', {}).get('size') if isinstance(file.get('metadata'), dict) else None,
-                })
-            except Exception:
-                continue
+        # Started now and awaited just before the response loop, so the round trip
+        # overlaps the storage totals and URL indexes computed in between
+        linked_assets_info_task = asyncio.create_task(fetch_linked_assets_info())
         
-        # Get metadata for all files from database
-        all_file_public_urls = [fd['publicUrl'] for fd in all_file_data if fd['publicUrl']]
-        all_db_documents = []
-        if all_file_public_urls:
-            try:
-                # Note: Prisma Python doesn't support 'select', so we fetch all fields
-                all_db_documents_raw = await prisma.assetsdocument.find_many(
-                    where={"documentUrl": {"in": all_file_public_urls}}
-                )
-                # Extract only the fields we need
-                all_db_documents = [
-                    {
-                        "documentUrl": doc.documentUrl,
-                        "documentType": doc.documentType,
-                        "documentSize": doc.documentSize,
-                        "fileName": doc.fileName,
-                        "mimeType": doc.mimeType,
-                    }
-                    for doc in all_db_documents_raw
-                ]
-            except Exception as e:
-                logger.warning(f"Error querying all documents for storage calculation: {e}")
+        # Calculate total storage used
+        total_storage_used = sized_storage_used + unsized_storage_used
         
-        all_document_url_to_metadata: Dict[str, Dict[str, Any]] = {}
-        for doc in all_db_documents:
-            if doc.get('documentUrl'):
-                all_document_url_to_metadata[doc['documentUrl']] = {
-                    "documentType": doc.get('documentType'),
-                    "documentSize": doc.get('documentSize'),
-                    "fileName": doc.get('fileName'),
-                    "mimeType": doc.get('mimeType'),
-                }
+        # Normalized database documentUrl -> documentUrl (first one wins, as in a linear scan)
+        normalized_document_urls: Dict[str, str] = {}
+        for db_document_url in document_url_to_asset_tag_ids:
+            normalized_document_urls.setdefault(_normalize_url(db_document_url), db_document_url)
         
-        # Calculate total storage used
-        total_storage_used = sum(
-            (fd.get('storageSize') or all_document_url_to_metadata.get(fd['publicUrl'], {}).get('documentSize') or 0)
-            for fd in all_file_data
-        )
+        linked_assets_info_map = await linked_assets_info_task
         
         # Build the response (only for paginated documents)
         documents = []
         for fd in file_data:
-            # Find matching database documentUrl
-            normalized_public_url = normalize_url(fd['publicUrl'])
-            matching_db_document_url = None
-            
-            for db_document_url in document_url_to_asset_tag_ids.keys():
-                normalized_db_url = normalize_url(db_document_url)
-                if db_document_url == fd['publicUrl'] or normalized_db_url == normalized_public_url:
-                    matching_db_document_url = db_document_url
-                    break
-            
-            # Also check by filename if no exact match found
-            if not matching_db_document_url and fd['actualFileName']:
-                for db_document_url in document_url_to_asset_tag_ids.keys():
-                    if fd['actualFileName'].lower() in db_document_url.lower():
-                        matching_db_document_url = db_document_url
-                        break
+            # Find matching database documentUrl (an exact match normalizes the same way)
+            # Every fetched row matches a page URL, so there is no separate filename
+            # fallback: a same-named row would belong to a different page file
+            matching_db_document_url = normalized_document_urls.get(_normalize_url(fd['publicUrl']))
             
             # Use database documentUrl if found, otherwise use storage publicUrl
             final_document_url = matching_db_document_url or fd['publicUrl']
@@ -2195,7 +2188,7 @@ async def get_documents(
                 {"assetTagId": tag_id, "isDeleted": linked_assets_info_map.get(tag_id, False)}
                 for tag_id in linked_asset_tag_ids
             ]
-            has_deleted_asset = any(info['isDeleted'] for info in linked_assets_info)
+            has_deleted_asset = any(linked_assets_info_map.get(tag_id, False) for tag_id in linked_asset_tag_ids)
             
             # Get metadata
             db_metadata = document_url_to_metadata.get(final_document_url) or document_url_to_metadata.get(fd['publicUrl']) or {}
@@ -2291,64 +2284,16 @@ async def upload_document(
             )
         
         # Validate file size (max 5MB per file)
-        max_file_size = 5 * 1024 * 1024  # 5MB
-        file_content = await file.read()
+        file_content = await read_upload_file(file, 5 * 1024 * 1024)
         file_size = len(file_content)
         
-        if file_size > max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail="File size too large. Maximum size is 5MB."
-            )
-        
         # Check storage limit (5MB total - temporary)
         storage_limit = 5 * 1024 * 1024  # 5MB limit
         
         supabase_admin = get_supabase_admin_client()
         
         try:
-            # List all files to calculate total size
-            async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-                all_files: List[Dict[str, Any]] = []
-                try:
-                    response = supabase_admin.storage.from_(bucket).list(folder, {"limit": 1000})
-                    if not response:
-                        return all_files
-                    for item in response:
-                        item_path = f"{folder}/{item['name']}" if folder else item['name']
-                        is_folder = item.get('id') is None
-                        if is_folder:
-                            sub_files = await list_all_files(bucket, item_path)
-                            all_files.extend(sub_files)
-                        else:
-                            all_files.append({
-                                "metadata": item.get('metadata', {}),
-                                "path": item_path
-                            })
-                except Exception:
-                    pass
-                return all_files
-            
-            assets_files = await list_all_files('assets', '')
-            file_history_files = await list_all_files('file-history', 'assets')
-            
-            # Calculate storage from files
-            current_storage_used = 0
-            for f in assets_files + file_history_files:
-                if isinstance(f.get('metadata'), dict) and f['metadata'].get('size'):
-                    current_storage_used += f['metadata']['size']
-            
-            # Also check database for documents that might have size info
-            try:
-                db_documents = await prisma.assetsdocument.find_many(
-                    select={"documentUrl": True, "documentSize": True}
-                )
-                storage_sizes = {f.get('metadata', {}).get('size') for f in assets_files + file_history_files if isinstance(f.get('metadata'), dict)}
-                for doc in db_documents:
-                    if doc.get('documentSize') and doc['documentSize'] not in storage_sizes:
-                        current_storage_used += doc['documentSize']
-            except Exception:
-                pass
+            current_storage_used = await get_storage_used(supabase_admin)
             
             if current_storage_used + file_size > storage_limit:
                 raise HTTPException(
@@ -2413,6 +2358,8 @@ async def upload_document(
                 detail="Failed to get public URL for uploaded document"
             )
         
+        adjust_storage_used(file_size)
+        
         # Create database record for the document
         asset_tag_id = 'STANDALONE'
         
@@ -2610,14 +2557,13 @@ async def delete_document_by_url(
         # Delete the file from storage
         try:
             supabase_admin = get_supabase_admin_client()
-            import re
             from urllib.parse import unquote
             
             # Decode URL-encoded characters
             decoded_url = unquote(documentUrl)
             
             # Extract bucket and path from URL
-            url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', decoded_url)
+            url_match = _SUPABASE_PUBLIC_URL_RE.search(decoded_url)
             if url_match:
                 bucket = url_match.group(1)
                 path = url_match.group(2)
@@ -2632,6 +2578,7 @@ async def delete_document_by_url(
                 
                 # Delete from storage
                 delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                invalidate_storage_used()
                 
                 # Check for errors in response
                 if delete_response:
@@ -2774,14 +2721,13 @@ async def bulk_delete_documents(
             
             # Delete the file from storage
             try:
-                import re
                 from urllib.parse import unquote
                 
                 # Decode URL-encoded characters
                 decoded_url = unquote(document_url)
                 
                 # Extract bucket and path from URL
-                url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', decoded_url)
+                url_match = _SUPABASE_PUBLIC_URL_RE.search(decoded_url)
                 if url_match:
                     bucket = url_match.group(1)
                     path = url_match.group(2)
@@ -2794,6 +2740,7 @@ async def bulk_delete_documents(
                     
                     # Delete from storage
                     delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                    invalidate_storage_used()
                     
                     # Check for errors in response
                     if delete_response:
@@ -2972,13 +2919,14 @@ async def get_media(
             all_files: List[Dict[str, Any]] = []
             
             try:
-                response = supabase_admin.storage.from_(bucket).list(folder, {
-                    "limit": 1000
-                })
+                response = await asyncio.to_thread(
+                    supabase_admin.storage.from_(bucket).list, folder, {"limit": 1000}
+                )
                 
                 if not response:
                     return all_files
                 
+                subfolders: List[str] = []
                 for item in response:
                     item_path = f"{folder}/{item['name']}" if folder else item['name']
                     
@@ -2986,9 +2934,8 @@ async def get_media(
                     is_folder = item.get('id') is None
                     
                     if is_folder:
-                        # It's a folder, recursively list files inside
-                        sub_files = await list_all_files(bucket, item_path)
-                        all_files.extend(sub_files)
+                        # Listed below, concurrently with the sibling folders
+                        subfolders.append(item_path)
                     else:
                         # Include all files
                         all_files.append({
@@ -2998,36 +2945,35 @@ async def get_media(
                             "path": item_path,
                             "metadata": item.get('metadata', {})
                         })
+                
+                for sub_files in await asyncio.gather(*(list_all_files(bucket, path) for path in subfolders)):
+                    all_files.extend(sub_files)
             except Exception as e:
                 logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
             
             return all_files
         
         # Fetch fresh file list
-        # List files from assets_images folder in assets bucket
-        assets_files = await list_all_files('assets', 'assets_images')
-        
-        # List files from assets_images folder in file-history bucket
-        file_history_files = await list_all_files('file-history', 'assets/assets_images')
+        # List files from assets_images folder in the assets and file-history buckets, concurrently
+        assets_files, file_history_files = await asyncio.gather(
+            list_all_files('assets', 'assets_images'),
+            list_all_files('file-history', 'assets/assets_images'),
+        )
         
         # Combine files from both buckets
         combined_files: List[Dict[str, Any]] = []
         
-        # Add files from assets bucket (only from assets_images folder)
-        # Filter by path to ensure we only get images, not documents from assets_documents
+        # Add files from assets bucket (only from assets_images folder, so no documents)
         for file in assets_files:
-            # Ensure file is in assets_images folder and NOT in assets_documents folder
-            if file['path'].startswith('assets_images/') and not file['path'].startswith('assets_documents/'):
+            if file['path'].startswith('assets_images/'):
                 combined_files.append({
                     **file,
                     "bucket": 'assets',
                 })
         
         # Add files from file-history bucket (only from assets/assets_images folder)
-        # Filter by path to ensure we only get images, not documents from assets/assets_documents
         for file in file_history_files:
-            # Ensure file is in assets/assets_images folder and NOT in assets/assets_documents folder
-            if file['path'].startswith('assets/assets_images/') and not file['path'].startswith('assets/assets_documents/'):
+            if file['path'].startswith('assets/assets_images/'):
                 combined_files.append({
                     **file,
                     "bucket": 'file-history',
@@ -3044,8 +2990,7 @@ async def get_media(
         # Prepare file data and extract URLs/assetTagIds
         file_data = []
         for file in paginated_files:
-            url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-            public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
+            public_url = get_public_storage_url(file['bucket'], file['path'])
             
             # Extract full filename and assetTagId
             path_parts = file['path'].split('/')
@@ -3053,10 +2998,7 @@ async def get_media(
             
             # Extract assetTagId - filename format is: assetTagId-timestamp.ext
             file_name_without_ext = actual_file_name.rsplit('.', 1)[0] if '.' in actual_file_name else actual_file_name
-            # Try to match pattern: assetTagId-YYYY-MM-DDTHH-MM-SS-sssZ
-            import re
-            timestamp_match = re.search(r'-(20\d{2}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)$', file_name_without_ext)
-            asset_tag_id = file_name_without_ext[:timestamp_match.start()] if timestamp_match else file_name_without_ext.split('-')[0] if '-' in file_name_without_ext else file_name_without_ext
+            asset_tag_id = _asset_tag_from_file_name(file_name_without_ext)
             
             # If the extracted assetTagId is "media", it's a standalone media upload, not linked to an asset
             if asset_tag_id == 'media':
@@ -3072,18 +3014,15 @@ async def get_media(
             })
         
         # Batch query: Get all linked images in a single query
-        all_public_urls = [fd['publicUrl'] for fd in file_data if fd['publicUrl']]
-        
-        # Normalize URLs by removing query parameters and fragments for better matching
-        def normalize_url(url: str) -> str:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-            except:
-                return url.split('?')[0].split('#')[0]
+        # Deduplicated up front so the IN lists carry each URL once
+        all_public_urls = list(dict.fromkeys(fd['publicUrl'] for fd in file_data if fd['publicUrl']))
+        public_url_set = set(all_public_urls)
         
-        normalized_public_urls = [normalize_url(url) for url in all_public_urls]
+        # Only normalized forms that differ from a raw URL need their own IN arm
+        normalized_public_urls = list(dict.fromkeys(
+            normalized for normalized in map(_normalize_url, all_public_urls)
+            if normalized not in public_url_set
+        ))
         
         # Build OR conditions for URL matching
         url_conditions = []
@@ -3127,7 +3066,7 @@ async def get_media(
                 continue
             
             img_url = img['imageUrl']
-            normalized_img_url = normalize_url(img_url)
+            normalized_img_url = _normalize_url(img_url)
             
             # Store metadata
             image_url_to_metadata[img_url] = {
@@ -3148,14 +3087,14 @@ async def get_media(
         # Match database URLs to storage publicUrls
         for fd in file_data:
             public_url = fd['publicUrl']
-            normalized_public_url = normalize_url(public_url)
+            normalized_public_url = _normalize_url(public_url)
             
             # Check if any database URL matches this publicUrl
             for img in all_linked_images:
                 if not img.get('assetTagId') or not img.get('imageUrl'):
                     continue
                 
-                normalized_db_url = normalize_url(img['imageUrl'])
+                normalized_db_url = _normalize_url(img['imageUrl'])
                 
                 # Match by exact URL or normalized URL
                 if img['imageUrl'] == public_url or normalized_db_url == normalized_public_url:
@@ -3170,14 +3109,14 @@ async def get_media(
             if not actual_file_name:
                 continue
             
-            normalized_public_url = normalize_url(public_url)
+            normalized_public_url = _normalize_url(public_url)
             file_name_lower = actual_file_name.lower()
             
             for img in all_linked_images:
                 if not img.get('assetTagId') or not img.get('imageUrl'):
                     continue
                 
-                normalized_db_url = normalize_url(img['imageUrl'])
+                normalized_db_url = _normalize_url(img['imageUrl'])
                 db_url_lower = img['imageUrl'].lower()
                 
                 # Check multiple matching strategies
@@ -3206,13 +3145,12 @@ async def get_media(
             except Exception as e:
                 logger.warning(f"Error querying linked assets: {e}")
         
-        # Calculate total storage used from ALL files (not just paginated)
-        images_files = [f for f in combined_files if f['path'].startswith('assets_images/') or f['path'].startswith('assets/assets_images/')]
+        # Calculate total storage used from ALL files (not just paginated);
+        # combined_files only holds images-folder paths already
         all_file_data = []
-        for file in images_files:
+        for file in combined_files:
             try:
-                url_data = supabase_admin.storage.from_(file['bucket']).get_public_url(file['path'])
-                public_url = url_data.get('publicUrl', '') if isinstance(url_data, dict) else str(url_data)
+                public_url = get_public_storage_url(file['bucket'], file['path'])
                 all_file_data.append({
                     "publicUrl": public_url,
                     "storageSize": file.get('metadata', {}).get('size') if isinstance(file.get('metadata'), dict) else None,
@@ -3221,12 +3159,16 @@ async def get_media(
                 continue
         
         # Get metadata for all files from database
-        all_file_public_urls = [fd['publicUrl'] for fd in all_file_data if fd['publicUrl']]
+        all_file_public_urls = list(dict.fromkeys(fd['publicUrl'] for fd in all_file_data if fd['publicUrl']))
         all_db_images = []
         if all_file_public_urls:
             try:
-                # Normalize URLs for matching
-                normalized_all_urls = [normalize_url(url) for url in all_file_public_urls]
+                # Normalize URLs for matching, skipping ones identical to a raw URL
+                all_file_url_set = set(all_file_public_urls)
+                normalized_all_urls = list(dict.fromkeys(
+                    normalized for normalized in map(_normalize_url, all_file_public_urls)
+                    if normalized not in all_file_url_set
+                ))
                 
                 # Build OR conditions for URL matching
                 all_url_conditions = []
@@ -3267,12 +3209,12 @@ async def get_media(
         images = []
         for fd in file_data:
             public_url = fd['publicUrl']
-            normalized_public_url = normalize_url(public_url)
+            normalized_public_url = _normalize_url(public_url)
             
             # Find matching database imageUrl
             matching_db_image_url = None
             for db_image_url in image_url_to_asset_tag_ids.keys():
-                normalized_db_url = normalize_url(db_image_url)
+                normalized_db_url = _normalize_url(db_image_url)
                 if db_image_url == public_url or normalized_db_url == normalized_public_url:
                     matching_db_image_url = db_image_url
                     break
@@ -3361,54 +3303,17 @@ async def upload_media(
                 detail="Invalid file type. Only JPEG, PNG, GIF, and WebP images are allowed."
             )
 
-        # Read file content
-        contents = await file.read()
+        # Read file content (max 5MB per file)
+        contents = await read_upload_file(file, 5 * 1024 * 1024)
         file_size = len(contents)
 
-        # Validate file size (max 5MB per file)
-        max_file_size = 5 * 1024 * 1024  # 5MB
-        if file_size > max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail="File size too large. Maximum size is 5MB."
-            )
-
         # Check storage limit (5GB total)
         storage_limit = 5 * 1024 * 1024 * 1024  # 5GB
         supabase_admin = get_supabase_admin_client()
 
-        # Calculate current storage used (simplified - just check if we're close to limit)
-        # In production, you might want to cache this or calculate more efficiently
+        # Calculate current storage used (cached between uploads, see get_storage_used)
         try:
-            # List files to calculate storage
-            async def list_all_files(bucket: str, folder: str = "") -> List[Dict[str, Any]]:
-                all_files: List[Dict[str, Any]] = []
-                try:
-                    response = supabase_admin.storage.from_(bucket).list(folder, {"limit": 1000})
-                    if not response:
-                        return all_files
-                    for item in response:
-                        item_path = f"{folder}/{item['name']}" if folder else item['name']
-                        is_folder = item.get('id') is None
-                        if is_folder:
-                            sub_files = await list_all_files(bucket, item_path)
-                            all_files.extend(sub_files)
-                        else:
-                            all_files.append({
-                                "metadata": item.get('metadata', {}),
-                                "path": item_path
-                            })
-                except Exception as e:
-                    logger.warning(f"Error listing files from {bucket}/{folder}: {e}")
-                return all_files
-
-            assets_files = await list_all_files('assets', '')
-            file_history_files = await list_all_files('file-history', 'assets')
-
-            current_storage_used = 0
-            for f in assets_files + file_history_files:
-                if f.get('metadata', {}).get('size'):
-                    current_storage_used += f['metadata']['size']
+            current_storage_used = await get_storage_used(supabase_admin)
 
             if current_storage_used + file_size > storage_limit:
                 raise HTTPException(
@@ -3469,6 +3374,8 @@ async def upload_media(
                 detail="Failed to get public URL for uploaded image"
             )
 
+        adjust_storage_used(file_size)
+
         return {
             "filePath": final_file_path,
             "fileName": file_name,
@@ -3515,7 +3422,6 @@ async def delete_media(
         # Delete the file from storage
         try:
             supabase_admin = get_supabase_admin_client()
-            import re
             from urllib.parse import unquote, urlparse
             
             # Decode URL-encoded characters
@@ -3523,7 +3429,7 @@ async def delete_media(
             
             # Extract bucket and path from URL
             # URLs are like: https://[project].supabase.co/storage/v1/object/public/[bucket]/[path]
-            url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', decoded_url)
+            url_match = _SUPABASE_PUBLIC_URL_RE.search(decoded_url)
             if url_match:
                 bucket = url_match.group(1)
                 path = url_match.group(2)
@@ -3538,6 +3444,7 @@ async def delete_media(
                 
                 # Delete from storage
                 delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                invalidate_storage_used()
                 
                 # Check for errors in response
                 if delete_response:
@@ -3610,14 +3517,13 @@ async def bulk_delete_media(
 
             # Delete the file from storage
             try:
-                import re
                 from urllib.parse import unquote
                 
                 # Decode URL-encoded characters
                 decoded_url = unquote(image_url)
                 
                 # Extract bucket and path from URL
-                url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', decoded_url)
+                url_match = _SUPABASE_PUBLIC_URL_RE.search(decoded_url)
                 if url_match:
                     bucket = url_match.group(1)
                     path = url_match.group(2)
@@ -3630,6 +3536,7 @@ async def bulk_delete_media(
                     
                     # Delete from storage
                     delete_response = supabase_admin.storage.from_(bucket).remove([path])
+                    invalidate_storage_used()
                     
                     # Check for errors in response
                     if delete_response:
@@ -3737,8 +3644,7 @@ async def upload_document_to_asset(
             document_size = None
             try:
                 supabase_admin = get_supabase_admin_client()
-                import re
-                url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', document_url)
+                url_match = _SUPABASE_PUBLIC_URL_RE.search(document_url)
                 if url_match:
                     bucket = url_match.group(1)
                     full_path = url_match.group(2)
@@ -3807,15 +3713,9 @@ async def upload_document_to_asset(
                 detail="Invalid file type. Only PDF, DOC, DOCX, XLS, XLSX, TXT, CSV, RTF, JPEG, PNG, GIF, and WebP files are allowed."
             )
 
-        # Validate file size
-        contents = await file.read()
+        # Validate file size (max 5MB)
+        contents = await read_upload_file(file, 5 * 1024 * 1024)
         file_size = len(contents)
-        max_file_size = 5 * 1024 * 1024  # 5MB
-        if file_size > max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail="File size too large. Maximum size is 5MB."
-            )
 
         # Generate unique file path
         timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
@@ -3955,8 +3855,7 @@ async def upload_image_to_asset(
             image_size = None
             try:
                 supabase_admin = get_supabase_admin_client()
-                import re
-                url_match = re.search(r'/storage/v1/object/public/([^/]+)/(.+)', image_url)
+                url_match = _SUPABASE_PUBLIC_URL_RE.search(image_url)
                 if url_match:
                     bucket = url_match.group(1)
                     full_path = url_match.group(2)
@@ -4002,15 +3901,9 @@ async def upload_image_to_asset(
                 detail="Invalid file type. Only JPEG, PNG, GIF, and WebP images are allowed."
             )
 
-        # Validate file size
-        contents = await file.read()
+        # Validate file size (max 5MB)
+        contents = await read_upload_file(file, 5 * 1024 * 1024)
         file_size = len(contents)
-        max_size = 5 * 1024 * 1024  # 5MB
-        if file_size > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail="File size too large. Maximum size is 5MB."
-            )
 
         # Generate unique file path
         timestamp = datetime.now().isoformat().replace(':', '-').replace('.', '-')
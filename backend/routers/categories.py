@@ -6,12 +6,12 @@ from typing import Optional
 import logging
 from models.categories import (
     Category,
-    SubCategory,
     CategoryCreate,
     CategoryUpdate,
     CategoriesResponse,
     CategoryResponse
 )
+from models import CATEGORY_LIST_ADAPTER
 from auth import verify_auth
 from database import prisma
 
@@ -70,33 +70,10 @@ async def get_categories(
                 order={"name": "asc"}
             )
         
-        categories = []
-        for cat in categories_data:
-            try:
-                # Map subcategories
-                subcategories = []
-                if cat.subCategories:
-                    for subcat in cat.subCategories:
-                        subcategories.append(SubCategory(
-                            id=str(subcat.id),
-                            name=str(subcat.name),
-                            description=subcat.description if subcat.description else None
-                        ))
-                
-                category = Category(
-                    id=str(cat.id),
-                    name=str(cat.name),
-                    description=cat.description if cat.description else None,
-                    subCategories=subcategories,
-                    createdAt=cat.createdAt,
-                    updatedAt=cat.updatedAt
-                )
-                categories.append(category)
-            except Exception as e:
-                logger.error(f"Error creating Category model: {type(e).__name__}: {str(e)}", exc_info=True)
-                continue
+        categories = CATEGORY_LIST_ADAPTER.validate_python(categories_data, from_attributes=True)
         
-        return CategoriesResponse(categories=categories)
+        # Items are already validated, so skip re-validating the wrapper
+        return CategoriesResponse.model_construct(categories=categories)
     
     except HTTPException:
         raise
@@ -150,24 +127,7 @@ async def create_category(
             }
         )
         
-        # Map subcategories
-        subcategories = []
-        if new_category.subCategories:
-            for subcat in new_category.subCategories:
-                subcategories.append(SubCategory(
-                    id=str(subcat.id),
-                    name=str(subcat.name),
-                    description=subcat.description if subcat.description else None
-                ))
-        
-        category = Category(
-            id=str(new_category.id),
-            name=str(new_category.name),
-            description=new_category.description if new_category.description else None,
-            subCategories=subcategories,
-            createdAt=new_category.createdAt,
-            updatedAt=new_category.updatedAt
-        )
+        category = Category.model_validate(new_category)
         
         return CategoryResponse(category=category)
     
@@ -237,24 +197,7 @@ async def update_category(
             }
         )
         
-        # Map subcategories
-        subcategories = []
-        if updated_category.subCategories:
-            for subcat in updated_category.subCategories:
-                subcategories.append(SubCategory(
-                    id=str(subcat.id),
-                    name=str(subcat.name),
-                    description=subcat.description if subcat.description else None
-                ))
-        
-        category = Category(
-            id=str(updated_category.id),
-            name=str(updated_category.name),
-            description=updated_category.description if updated_category.description else None,
-            subCategories=subcategories,
-            createdAt=updated_category.createdAt,
-            updatedAt=updated_category.updatedAt
-        )
+        category = Category.model_validate(updated_category)
         
         return CategoryResponse(category=category)
     
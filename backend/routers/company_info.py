@@ -12,10 +12,13 @@ from models.company_info import (
     CompanyInfo,
     CompanyInfoCreate,
     CompanyInfoUpdate,
-    CompanyInfoResponse
+    CompanyInfoResponse,
+    get_company_info_cached,
+    invalidate_company_info_cache
 )
 from auth import verify_auth, SUPABASE_URL
 from database import prisma
+from routers.assets import invalidate_storage_used
 
 logger = logging.getLogger(__name__)
 
@@ -54,30 +57,7 @@ async def get_company_info(
 ):
     """Get company information (singleton - only one record)"""
     try:
-        # Get the most recent company info record (there should only be one)
-        company_info_data = await prisma.companyinfo.find_first(
-            order={"createdAt": "desc"}
-        )
-        
-        if not company_info_data:
-            return CompanyInfoResponse(companyInfo=None)
-        
-        company_info = CompanyInfo(
-            id=str(company_info_data.id),
-            companyName=str(company_info_data.companyName),
-            contactEmail=company_info_data.contactEmail if company_info_data.contactEmail else None,
-            contactPhone=company_info_data.contactPhone if company_info_data.contactPhone else None,
-            address=company_info_data.address if company_info_data.address else None,
-            zipCode=company_info_data.zipCode if company_info_data.zipCode else None,
-            country=company_info_data.country if company_info_data.country else None,
-            website=company_info_data.website if company_info_data.website else None,
-            primaryLogoUrl=company_info_data.primaryLogoUrl if company_info_data.primaryLogoUrl else None,
-            secondaryLogoUrl=company_info_data.secondaryLogoUrl if company_info_data.secondaryLogoUrl else None,
-            createdAt=company_info_data.createdAt,
-            updatedAt=company_info_data.updatedAt
-        )
-        
-        return CompanyInfoResponse(companyInfo=company_info)
+        return await get_company_info_cached(prisma)
     
     except Exception as e:
         logger.error(f"Error fetching company info: {type(e).__name__}: {str(e)}", exc_info=True)
@@ -127,6 +107,7 @@ async def create_or_update_company_info(
                     "secondaryLogoUrl": company_info_data.secondaryLogoUrl.strip() if company_info_data.secondaryLogoUrl else None,
                 }
             )
+            invalidate_company_info_cache()
             
             company_info = CompanyInfo(
                 id=str(updated_company_info.id),
@@ -159,6 +140,7 @@ async def create_or_update_company_info(
                     "secondaryLogoUrl": company_info_data.secondaryLogoUrl.strip() if company_info_data.secondaryLogoUrl else None,
                 }
             )
+            invalidate_company_info_cache()
             
             company_info = CompanyInfo(
                 id=str(new_company_info.id),
@@ -305,6 +287,10 @@ async def upload_logo(
                 detail="Failed to get public URL for uploaded logo"
             )
         
+        # The upload may have replaced an existing object (upsert), so recount
+        # rather than adding file_size to the cached storage usage
+        invalidate_storage_used()
+        
         # Update company info with logo URL
         existing = await prisma.companyinfo.find_first()
         
@@ -323,6 +309,7 @@ async def upload_logo(
                     "primaryLogoUrl" if logoType == 'primary' else "secondaryLogoUrl": public_url,
                 }
             )
+        invalidate_company_info_cache()
         
         return {
             "success": True,
@@ -374,6 +361,7 @@ async def delete_logo(
                 # Delete from storage
                 try:
                     supabase_admin.storage.from_(bucket).remove([path])
+                    invalidate_storage_used()
                 except Exception as delete_error:
                     logger.warning(f"Failed to delete logo from storage: {delete_error}")
                     # Continue even if storage deletion fails (file might not exist)
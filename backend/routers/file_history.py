@@ -19,6 +19,7 @@ from models.file_history import (
 )
 from auth import verify_auth, SUPABASE_URL
 from database import prisma
+from routers.assets import adjust_storage_used, invalidate_storage_used
 
 logger = logging.getLogger(__name__)
 
@@ -295,6 +296,8 @@ async def upload_file(
                 status_code=500,
                 detail=f"Failed to upload file to storage: {str(upload_error)}"
             )
+        # upsert is off, so this is always a new object
+        adjust_storage_used(len(file_content))
         
         # Get public URL
         url_data = supabase_admin.storage.from_("file-history").get_public_url(file_path)
@@ -417,6 +420,7 @@ async def delete_file_history(
             try:
                 supabase_admin = get_supabase_admin_client()
                 delete_response = supabase_admin.storage.from_("file-history").remove([file_history.filePath])
+                invalidate_storage_used()
                 if delete_response and isinstance(delete_response, dict) and delete_response.get("error"):
                     logger.error(f"Failed to delete file from storage: {delete_response.get('error')}")
             except Exception as storage_error:
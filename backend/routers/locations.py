@@ -11,6 +11,7 @@ from models.locations import (
     LocationsResponse,
     LocationResponse
 )
+from models import LOCATION_LIST_ADAPTER
 from auth import verify_auth
 from database import prisma
 from typing import List
@@ -68,22 +69,10 @@ async def get_locations(
                 order={"name": "asc"}
             )
         
-        locations = []
-        for loc in locations_data:
-            try:
-                location = Location(
-                    id=str(loc.id),
-                    name=str(loc.name),
-                    description=loc.description if loc.description else None,
-                    createdAt=loc.createdAt,
-                    updatedAt=loc.updatedAt
-                )
-                locations.append(location)
-            except Exception as e:
-                logger.error(f"Error creating Location model: {type(e).__name__}: {str(e)}", exc_info=True)
-                continue
-        
-        return LocationsResponse(locations=locations)
+        locations = LOCATION_LIST_ADAPTER.validate_python(locations_data, from_attributes=True)
+        
+        # Items are already validated, so skip re-validating the wrapper
+        return LocationsResponse.model_construct(locations=locations)
     
     except HTTPException:
         raise
@@ -134,13 +123,7 @@ async def create_location(
             }
         )
         
-        location = Location(
-            id=new_location.id,
-            name=new_location.name,
-            description=new_location.description,
-            createdAt=new_location.createdAt,
-            updatedAt=new_location.updatedAt
-        )
+        location = Location.model_validate(new_location)
         
         return LocationResponse(location=location)
     
@@ -206,13 +189,7 @@ async def update_location(
             }
         )
         
-        location = Location(
-            id=updated_location.id,
-            name=updated_location.name,
-            description=updated_location.description,
-            createdAt=updated_location.createdAt,
-            updatedAt=updated_location.updatedAt
-        )
+        location = Location.model_validate(updated_location)
         
         return LocationResponse(location=location)
     
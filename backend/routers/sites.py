@@ -11,6 +11,7 @@ from models.sites import (
     SitesResponse,
     SiteResponse
 )
+from models import SITE_LIST_ADAPTER
 from auth import verify_auth
 from database import prisma
 from typing import List
@@ -68,18 +69,10 @@ async def get_sites(
                 order={"name": "asc"}
             )
         
-        sites = [
-            Site(
-                id=site.id,
-                name=site.name,
-                description=site.description,
-                createdAt=site.createdAt,
-                updatedAt=site.updatedAt
-            )
-            for site in sites_data
-        ]
+        sites = SITE_LIST_ADAPTER.validate_python(sites_data, from_attributes=True)
         
-        return SitesResponse(sites=sites)
+        # Items are already validated, so skip re-validating the wrapper
+        return SitesResponse.model_construct(sites=sites)
     
     except HTTPException:
         raise
@@ -130,13 +123,7 @@ async def create_site(
             }
         )
         
-        site = Site(
-            id=new_site.id,
-            name=new_site.name,
-            description=new_site.description,
-            createdAt=new_site.createdAt,
-            updatedAt=new_site.updatedAt
-        )
+        site = Site.model_validate(new_site)
         
         return SiteResponse(site=site)
     
@@ -202,13 +189,7 @@ async def update_site(
             }
         )
         
-        site = Site(
-            id=updated_site.id,
-            name=updated_site.name,
-            description=updated_site.description,
-            createdAt=updated_site.createdAt,
-            updatedAt=updated_site.updatedAt
-        )
+        site = Site.model_validate(updated_site)
         
         return SiteResponse(site=site)
     
@@ -3,26 +3,26 @@ FastAPI startup script with Windows event loop fix
 Use this instead of running uvicorn directly
 Reads PORT from environment (for Railway/Render/Fly.io)
 """
-import sys
 import os
 import asyncio
 
-# Set event loop policy BEFORE importing anything that uses asyncio
-if sys.platform == 'win32':
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-
-# Now import and run uvicorn
 import uvicorn
 from main import app
+from database import get_loop_factory
 
 if __name__ == "__main__":
     # Read PORT from environment (Railway/Render/Fly.io set this)
     port = int(os.getenv("PORT", "8000"))
     
-    uvicorn.run(
+    config = uvicorn.Config(
         app,
         host="0.0.0.0",
         port=port,
-        loop="asyncio"
+        loop="none"
     )
+    server = uvicorn.Server(config)
+    
+    # Run on our own loop so Windows gets the selector loop without a global policy
+    with asyncio.Runner(loop_factory=get_loop_factory()) as runner:
+        runner.run(server.serve())
 
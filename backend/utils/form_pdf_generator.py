@@ -1,12 +1,16 @@
 """
 Form PDF generation utility using Playwright for HTML-to-PDF conversion
-Uses multiprocessing to avoid Windows asyncio subprocess issues
+Uses multiprocessing to avoid Windows asyncio subprocess issues; the worker
+processes keep Chromium running between requests
 """
 import asyncio
+import atexit
 import logging
 import multiprocessing
+import os
 from typing import List, Optional
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 logger = logging.getLogger(__name__)
 
@@ -349,124 +353,173 @@ PDF_STYLING_SCRIPT = """
 """
 
 
+# Chromium launch flags
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+    '--disable-web-security',
+]
+
+# Per-worker-process state. Launching Chromium takes seconds, so each worker
+# starts one browser on its first job and reuses it; every PDF gets its own
+# BrowserContext so cookies/storage never leak between requests.
+_worker_loop = None
+_worker_playwright = None
+_worker_browser = None
+
+
+async def _get_worker_browser():
+    """Return this worker's browser, (re)launching it if needed"""
+    global _worker_playwright, _worker_browser
+    
+    if _worker_browser is None or not _worker_browser.is_connected():
+        from playwright.async_api import async_playwright
+        
+        if _worker_playwright is None:
+            _worker_playwright = await async_playwright().start()
+            # Close Chromium and the Playwright driver when the worker exits
+            atexit.register(_close_worker_browser)
+        _worker_browser = await _worker_playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+    
+    return _worker_browser
+
+
+def _close_worker_browser() -> None:
+    """atexit hook in a worker process: close its browser, driver and loop"""
+    global _worker_loop, _worker_playwright, _worker_browser
+    
+    async def _close():
+        if _worker_browser is not None:
+            await _worker_browser.close()
+        if _worker_playwright is not None:
+            await _worker_playwright.stop()
+    
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    try:
+        _worker_loop.run_until_complete(_close())
+    except Exception:
+        # The browser may already be gone; the process is exiting either way
+        pass
+    finally:
+        _worker_loop.close()
+        _worker_loop = _worker_playwright = _worker_browser = None
+
+
+async def _wait_for_element(page, element_id: str) -> None:
+    """Wait for a target element to become visible on the page"""
+    try:
+        await page.wait_for_selector(element_id, timeout=20000, state="visible")
+    except Exception:
+        # Wait a bit more for React hydration
+        await asyncio.sleep(3)
+        element = await page.query_selector(element_id)
+        if not element:
+            raise ValueError(f"Element {element_id} not found on page")
+
+
 def _run_playwright_in_process(html: Optional[str], url: Optional[str], element_ids: List[str]) -> bytes:
     """
-    Run Playwright in a separate process with its own event loop.
+    Run Playwright in a worker process with its own event loop.
     This function is the target for multiprocessing.
     """
-    import asyncio
     import sys
     
-    # On Windows, we need to set the event loop policy for subprocess support
-    if sys.platform == 'win32':
-        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    global _worker_loop
     
     async def _generate():
-        from playwright.async_api import async_playwright
+        browser = await _get_worker_browser()
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                ]
-            )
+        # Set viewport to A4 proportions
+        context = await browser.new_context(viewport={"width": 794, "height": 1123})
+        
+        try:
+            page = await context.new_page()
             
-            try:
-                page = await browser.new_page()
-                
-                # Set viewport to A4 proportions
-                await page.set_viewport_size({"width": 794, "height": 1123})
-                
-                # Navigate or set content
-                if url:
-                    try:
-                        await page.goto(url, wait_until="networkidle", timeout=60000)
-                        
-                        # Wait for target elements
-                        for element_id in element_ids:
-                            try:
-                                await page.wait_for_selector(element_id, timeout=20000, state="visible")
-                            except Exception:
-                                # Wait a bit more for React hydration
-                                await asyncio.sleep(3)
-                                element = await page.query_selector(element_id)
-                                if not element:
-                                    raise ValueError(f"Element {element_id} not found on page")
-                    except Exception as nav_error:
-                        if html:
-                            await page.set_content(html, wait_until="networkidle", timeout=60000)
-                        else:
-                            raise ValueError(f"Failed to navigate to URL: {nav_error}")
-                elif html:
-                    await page.set_content(html, wait_until="networkidle", timeout=60000)
-                
-                # Wait for images
-                await page.evaluate("""
-                    async () => {
-                        const images = Array.from(document.querySelectorAll('img'));
-                        await Promise.all(
-                            images.map((img) => {
-                                if (img.complete) return Promise.resolve();
-                                return new Promise((resolve) => {
-                                    img.onload = resolve;
-                                    img.onerror = resolve;
-                                    setTimeout(resolve, 3000);
-                                });
-                            })
-                        );
-                        await document.fonts.ready;
-                    }
-                """)
-                
-                # Wait for dynamic content
-                await asyncio.sleep(2)
-                
-                # Verify elements exist
-                missing_elements = []
-                for element_id in element_ids:
-                    element = await page.query_selector(element_id)
-                    if not element:
-                        missing_elements.append(element_id)
-                
-                if missing_elements:
-                    raise ValueError(f"Elements {', '.join(missing_elements)} not found")
-                
-                # Apply PDF styling
-                await page.evaluate(PDF_STYLING_SCRIPT, element_ids)
-                
-                # Emulate print media
-                await page.emulate_media(media="print")
-                
-                # Generate PDF
-                pdf_data = await page.pdf(
-                    format="A4",
-                    print_background=True,
-                    margin={
-                        "top": "10mm",
-                        "right": "10mm",
-                        "bottom": "10mm",
-                        "left": "10mm",
-                    },
-                )
-                
-                return pdf_data
+            # Navigate or set content
+            if url:
+                try:
+                    await page.goto(url, wait_until="networkidle", timeout=60000)
+                    
+                    # Wait for all target elements at once (combined forms have several)
+                    results = await asyncio.gather(
+                        *(_wait_for_element(page, element_id) for element_id in element_ids),
+                        return_exceptions=True
+                    )
+                    for result in results:
+                        if isinstance(result, BaseException):
+                            raise result
+                except Exception as nav_error:
+                    if html:
+                        await page.set_content(html, wait_until="networkidle", timeout=60000)
+                    else:
+                        raise ValueError(f"Failed to navigate to URL: {nav_error}")
+            elif html:
+                await page.set_content(html, wait_until="networkidle", timeout=60000)
+            
+            # Wait for images
+            await page.evaluate("""
+                async () => {
+                    const images = Array.from(document.querySelectorAll('img'));
+                    await Promise.all(
+                        images.map((img) => {
+                            if (img.complete) return Promise.resolve();
+                            return new Promise((resolve) => {
+                                img.onload = resolve;
+                                img.onerror = resolve;
+                                setTimeout(resolve, 3000);
+                            });
+                        })
+                    );
+                    await document.fonts.ready;
+                }
+            """)
+            
+            # Wait for dynamic content
+            await asyncio.sleep(2)
+            
+            # Verify elements exist
+            elements = await asyncio.gather(*(page.query_selector(element_id) for element_id in element_ids))
+            missing_elements = [element_id for element_id, element in zip(element_ids, elements) if not element]
             
-            finally:
-                await browser.close()
+            if missing_elements:
+                raise ValueError(f"Elements {', '.join(missing_elements)} not found")
+            
+            # Apply PDF styling
+            await page.evaluate(PDF_STYLING_SCRIPT, element_ids)
+            
+            # Emulate print media
+            await page.emulate_media(media="print")
+            
+            # Generate PDF
+            pdf_data = await page.pdf(
+                format="A4",
+                print_background=True,
+                margin={
+                    "top": "10mm",
+                    "right": "10mm",
+                    "bottom": "10mm",
+                    "left": "10mm",
+                },
+            )
+            
+            return pdf_data
+        
+        finally:
+            await context.close()
     
-    # Create new event loop and run
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_generate())
-    finally:
-        loop.close()
+    # The loop lives as long as the worker, since the browser is bound to it
+    if _worker_loop is None:
+        # On Windows, we need to set the event loop policy for subprocess support
+        if sys.platform == 'win32':
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    
+    return _worker_loop.run_until_complete(_generate())
 
 
 def _process_wrapper(args):
@@ -478,6 +531,40 @@ def _process_wrapper(args):
 # Use spawn method for Windows compatibility
 _mp_context = multiprocessing.get_context('spawn')
 
+# Number of long-lived PDF worker processes (each holds one Chromium instance).
+# Also caps how many PDFs render at once; extra requests queue for a free worker.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared PDF worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=_mp_context)
+    return _executor
+
+
+def _reset_executor() -> None:
+    """Drop a broken pool (e.g. a worker was killed) so the next call starts a fresh one"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def shutdown_pdf_workers() -> None:
+    """
+    Stop the PDF worker pool, waiting for the workers to exit.
+    Each worker closes its browser on the way out (see _close_worker_browser).
+    Blocks, so call it via asyncio.to_thread from async code.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
 
 async def generate_form_pdf(
     html: Optional[str] = None,
@@ -501,14 +588,12 @@ async def generate_form_pdf(
     if not element_ids or len(element_ids) == 0:
         raise ValueError("Element ID(s) required")
     
-    # Run Playwright in a separate process to avoid Windows asyncio issues
-    loop = asyncio.get_event_loop()
-    
-    with ProcessPoolExecutor(max_workers=1, mp_context=_mp_context) as executor:
-        pdf_data = await loop.run_in_executor(
-            executor,
-            _process_wrapper,
-            (html, url, element_ids),
-        )
+    # Run Playwright in a worker process to avoid Windows asyncio issues
+    loop = asyncio.get_running_loop()
     
-    return pdf_data
+    try:
+        return await loop.run_in_executor(_get_executor(), _process_wrapper, (html, url, element_ids))
+    except BrokenProcessPool:
+        logger.warning("PDF worker pool broke, restarting it")
+        _reset_executor()
+        return await loop.run_in_executor(_get_executor(), _process_wrapper, (html, url, element_ids))